@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from shared_store import load_shared_tables, select
+
 
 st.set_page_config(page_title="Traitors Analytics", layout="wide")
 
@@ -55,16 +57,14 @@ COLOR_MAP = {
 }
 
 
-# @st.cache_data
+# One read-only, memory-mapped copy of the outputs per server process, shared
+# by every session; sessions only keep the rows they select (see select()).
+# Not st.cache_resource: load_shared_tables runs on every rerun so new CSVs
+# are picked up, and it returns the already-attached frames when they are not.
 def load_all_data():
-    age = pd.read_csv('outputs/age_survival_stats.csv')
-    base = pd.read_csv('outputs/baseline_composition.csv')
-    early = pd.read_csv('outputs/early_banishment_stats.csv')
-    surv = pd.read_csv('outputs/survival_stats.csv')
-    finalist = pd.read_csv('outputs/finalist_composition.csv')
-    votes = pd.read_csv('outputs/early_vote_composition.csv')
-    baseline = pd.read_csv('outputs/baseline_rounds.csv')
-    return age, base, early, surv, finalist, votes, baseline
+    tables = load_shared_tables()
+    return (tables["age"], tables["base"], tables["early"], tables["surv"],
+            tables["finalist"], tables["votes"], tables["baseline"])
 
 age_df, base_df, early_df, surv_df, finalist_df, votes_df, baseline_df = load_all_data()
 
@@ -91,7 +91,7 @@ if not selected_seasons:
     st.stop()
 
 def filter_s(df):
-    return df[df['season'].astype(str).isin([str(s) for s in selected_seasons])]
+    return select(df, df['season'].astype(str).isin([str(s) for s in selected_seasons]))
 
 f_age = filter_s(age_df)
 f_base = filter_s(base_df)
@@ -161,10 +161,11 @@ with tab2:
         color_discrete_map=COLOR_MAP
     )
     
-    f_finalists = finalist_df[
+    f_finalists = select(
+        finalist_df,
         (finalist_df['season'].astype(str).isin([str(s) for s in selected_seasons])) &
         (finalist_df['season'] != 'all')
-    ]
+    )
     gender_final = f_finalists[f_finalists['group_type'] == 'Inferred_Gender']
     race_final = f_finalists[f_finalists['group_type'] == 'ethnicity_group']
 
@@ -241,10 +242,11 @@ with tab4:
 
     selected_round = st.selectbox("Select Round Table", options=sorted(votes_df['round_table'].unique()))
 
-    round_votes = votes_df[
+    round_votes = select(
+        votes_df,
         (votes_df['round_table'] == selected_round) &
         (votes_df['Season'].astype(str).isin([str(s) for s in selected_seasons]))
-    ]
+    )
 
     if round_votes.empty:
         st.warning("No votes for this round/season.")
@@ -255,8 +257,14 @@ with tab4:
     # Filter for the selected round
     round_data = f_votes[f_votes['round_table'] == selected_round]
 
-    room_gender = round_data[['player', 'voter_gender']].drop_duplicates().groupby('voter_gender').size().reset_index(name='player_count')
-    room_race = round_data[['player', 'voter_ethnicity']].drop_duplicates().groupby('voter_ethnicity').size().reset_index(name='player_count')
+    # Room composition comes from the roster (everyone still in the game), not just who voted
+    room_data = select(
+        baseline_df,
+        (baseline_df['Round'] == selected_round) &
+        (baseline_df['Season'].astype(str).isin([str(s) for s in selected_seasons]))
+    )
+    room_gender = room_data.groupby('voter_gender')['player_count'].sum().reset_index()
+    room_race = room_data.groupby('voter_ethnicity')['player_count'].sum().reset_index()
 
     votes_gender = round_data.groupby('target_gender')['target'].count().reset_index(name='votes_received')
     votes_race = round_data.groupby('target_ethnicity')['target'].count().reset_index(name='votes_received')
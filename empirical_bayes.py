@@ -0,0 +1,169 @@
+import pandas as pd
+import numpy as np
+from scipy import stats
+
+from traitors_banishment_analysis import (
+    DATA_FILES_PATTERN,
+    VOTES_FILES_PATTERN,
+    OUTPUT_DIR,
+    EARLY_EPISODE_CUTOFFS,
+    GROUP_COLS,
+    load_and_prepare_all_seasons,
+    load_votes,
+    enrich_votes_with_demographics,
+)
+
+
+CREDIBLE_LEVEL = 0.95
+# Lower bound on the prior concentration alpha + beta. The upper bound is the
+# pooled n behind each prior: when the between-season spread is all binomial
+# noise the prior is worth at most the data it was estimated from.
+MIN_CONCENTRATION = 1e-2
+PRIOR_KEYS = ["metric", "group_type", "group_value"]
+
+
+def fit_beta_priors(cells, keys=PRIOR_KEYS):
+    # Method of moments on sufficient statistics, one prior per key across
+    # every season (and round) cell: observed spread of k/n minus the
+    # binomial noise expected at each cell's n is the between-cell variance.
+    data = cells[cells["n"] > 0].assign(
+        p=lambda d: d["k"] / d["n"],
+        inv_n=lambda d: 1 / d["n"],
+    )
+    grouped = data.groupby(keys)
+    stats = grouped.agg(k=("k", "sum"), n=("n", "sum"), cells=("k", "size"), mean_inv_n=("inv_n", "mean"))
+
+    mu = (stats["k"] / stats["n"]).clip(1e-6, 1 - 1e-6)
+    spread = data.assign(dev=(data["p"] - mu.reindex(pd.MultiIndex.from_frame(data[keys])).to_numpy()) ** 2)
+    observed = spread.groupby(keys)["dev"].mean()
+
+    binomial = mu * (1 - mu) * stats["mean_inv_n"]
+    tau2 = ((observed - binomial) / (1 - stats["mean_inv_n"]).clip(lower=1e-9)).clip(lower=0)
+    concentration = (mu * (1 - mu) / tau2.where(tau2 > 0) - 1).fillna(stats["n"])
+    concentration = concentration.clip(MIN_CONCENTRATION, stats["n"].astype(float))
+
+    return pd.DataFrame({
+        "prior_mean": mu,
+        "prior_concentration": concentration,
+        "prior_alpha": mu * concentration,
+        "prior_beta": (1 - mu) * concentration,
+        "prior_cells": stats["cells"],
+    }).reset_index()
+
+
+def shrink(cells, keys=PRIOR_KEYS, level=CREDIBLE_LEVEL):
+    priors = fit_beta_priors(cells, keys)
+    out = cells.merge(priors, on=keys, how="left")
+
+    post_a = out["prior_alpha"].to_numpy() + out["k"].to_numpy()
+    post_b = out["prior_beta"].to_numpy() + (out["n"] - out["k"]).to_numpy()
+    tail = (1 - level) / 2
+
+    out["raw_proportion"] = np.where(out["n"] > 0, out["k"] / out["n"].where(out["n"] > 0), np.nan)
+    out["shrunk_rate"] = post_a / (post_a + post_b)
+    out["ci_low"] = stats.beta.ppf(tail, post_a, post_b)
+    out["ci_high"] = stats.beta.ppf(1 - tail, post_a, post_b)
+    return out
+
+
+def _complete_groups(counts, season_totals, group_values, extra_keys=()):
+    # Groups with no events in a season are real zeros, not missing cells
+    keys = ["season", *extra_keys]
+    index = pd.MultiIndex.from_frame(season_totals[keys]).repeat(len(group_values))
+    grid = index.to_frame(index=False)
+    grid["group_value"] = np.tile(group_values, len(season_totals))
+    grid = grid.merge(season_totals, on=keys)
+    grid = grid.merge(counts, on=keys + ["group_value"], how="left")
+    grid["k"] = grid["k"].fillna(0).astype(int)
+    return grid
+
+
+def early_banishment_cells(df, episode_cutoff=EARLY_EPISODE_CUTOFFS):
+    # Share of a season's early banishments that fell on each group
+    early = df[df["is_banished"] & (df["Episode"] <= episode_cutoff)].assign(season=lambda d: d["Season"].astype(str))
+    totals = early.groupby("season").size().reset_index(name="n")
+    rows = []
+    for col in GROUP_COLS:
+        counts = early.groupby(["season", col]).size().reset_index(name="k").rename(columns={col: "group_value"})
+        cells = _complete_groups(counts, totals, sorted(df[col].dropna().unique()))
+        cells["group_type"] = col
+        rows.append(cells)
+    out = pd.concat(rows, ignore_index=True)
+    out["metric"] = "early_banishment_share"
+    out["round"] = np.nan
+    return out
+
+
+def finalist_cells(df):
+    data = df.assign(season=df["Season"].astype(str))
+    final_episode = data.groupby("season")["Episode"].transform("max")
+    finalists = data[data["Episode"] == final_episode]
+    totals = finalists.groupby("season").size().reset_index(name="n")
+    rows = []
+    for col in GROUP_COLS:
+        counts = finalists.groupby(["season", col]).size().reset_index(name="k").rename(columns={col: "group_value"})
+        cells = _complete_groups(counts, totals, sorted(df[col].dropna().unique()))
+        cells["group_type"] = col
+        rows.append(cells)
+    out = pd.concat(rows, ignore_index=True)
+    out["metric"] = "finalist_share"
+    out["round"] = np.nan
+    return out
+
+
+def round_vote_share_cells(votes_enriched_df):
+    votes = votes_enriched_df.assign(
+        season=votes_enriched_df["Season"].astype(str),
+        round=votes_enriched_df["round_table"].astype(int),
+    )
+    totals = votes.groupby(["season", "round"]).size().reset_index(name="n")
+    rows = []
+    for col, group_type in [("target_gender", "Inferred_Gender"), ("target_ethnicity", "ethnicity_group")]:
+        counts = (
+            votes.groupby(["season", "round", col]).size()
+            .reset_index(name="k").rename(columns={col: "group_value"})
+        )
+        cells = _complete_groups(counts, totals, sorted(votes[col].dropna().unique()), extra_keys=["round"])
+        cells["group_type"] = group_type
+        rows.append(cells)
+    out = pd.concat(rows, ignore_index=True)
+    out["metric"] = "round_vote_share"
+    return out
+
+
+def shrunken_rates(df, votes_enriched_df, episode_cutoff=EARLY_EPISODE_CUTOFFS):
+    cells = pd.concat([
+        early_banishment_cells(df, episode_cutoff),
+        finalist_cells(df),
+        round_vote_share_cells(votes_enriched_df),
+    ], ignore_index=True)
+    out = shrink(cells)
+    columns = ["metric", "season", "round", "group_type", "group_value", "k", "n",
+               "raw_proportion", "shrunk_rate", "ci_low", "ci_high",
+               "prior_mean", "prior_concentration", "prior_alpha", "prior_beta"]
+    return out[columns].sort_values(["metric", "group_type", "group_value", "season", "round"], ignore_index=True)
+
+
+def main():
+    OUTPUT_DIR.mkdir(exist_ok=True)
+
+    try:
+        df = load_and_prepare_all_seasons(DATA_FILES_PATTERN)
+        votes_df = load_votes(VOTES_FILES_PATTERN)
+    except FileNotFoundError as e:
+        print(e)
+        return
+
+    votes_enriched = enrich_votes_with_demographics(votes_df, df)
+    rates = shrunken_rates(df, votes_enriched)
+
+    priors = rates.drop_duplicates(PRIOR_KEYS)[PRIOR_KEYS + ["prior_mean", "prior_concentration"]]
+    print("\nFitted beta priors:")
+    print(priors.to_string(index=False))
+
+    rates.to_csv(OUTPUT_DIR / "shrunken_rates.csv", index=False)
+    rates.to_json(OUTPUT_DIR / "shrunken_rates.json", orient="records")
+    print(f"Files saved in: {OUTPUT_DIR.resolve()}")
+
+if __name__ == "__main__":
+    main()
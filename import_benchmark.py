@@ -0,0 +1,109 @@
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+
+# What each entry point pays before doing any work
+TARGETS = {
+    "analysis_cli": "import traitors_banishment_analysis",
+    "scraper_helpers": "import traitors_data",
+    "dashboard": "import streamlit, plotly.express, plotly.graph_objects, pandas",
+}
+REPEATS = 5
+TOP_N = 5
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    # Top-level imports are the ones with a single leading space before the name
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            rows.append({
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": (len(m.group(3)) - 1) // 2,
+                "module": m.group(4),
+            })
+    return pd.DataFrame(rows, columns=["self_us", "cumulative_us", "depth", "module"])
+
+
+def time_import(statement, cwd):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=cwd, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        return None, None, result.stderr.strip().splitlines()[-1]
+    return wall, parse_importtime(result.stderr), None
+
+
+def benchmark(targets, repeats, cwd):
+    rows = []
+    for name, statement in targets.items():
+        walls, imports = [], []
+        error = None
+        for _ in range(repeats):
+            wall, parsed, error = time_import(statement, cwd)
+            if error:
+                break
+            walls.append(wall)
+            imports.append(parsed[parsed["depth"] == 0]["cumulative_us"].sum() / 1e6)
+
+        if error:
+            print(f"{name}: failed ({error})")
+            rows.append({"target": name, "error": error})
+            continue
+
+        # Heaviest direct dependencies, not the entry point modules themselves
+        own = {m.strip() for m in statement.replace("import", "").split(",")}
+        heaviest = (
+            parsed[(parsed["depth"] <= 1) & ~parsed["module"].isin(own)]
+            .nlargest(TOP_N, "cumulative_us")[["module", "cumulative_us"]]
+        )
+        print(f"\n{name}: median import {statistics.median(imports):.3f}s, "
+              f"median process {statistics.median(walls):.3f}s")
+        print(heaviest.to_string(index=False))
+
+        rows.append({
+            "target": name,
+            "median_import_s": statistics.median(imports),
+            "median_process_s": statistics.median(walls),
+            "min_import_s": min(imports),
+            "heaviest_dependency": heaviest["module"].iloc[0] if not heaviest.empty else None,
+            "error": None,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track cold-start import latency of the project entry points.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--csv", type=Path, help="append results to this CSV to track them over time")
+    args = parser.parse_args()
+
+    results = benchmark(TARGETS, args.repeats, Path(__file__).resolve().parent)
+    results.insert(0, "timestamp", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    results.insert(1, "python", sys.version.split()[0])
+
+    print("\nSummary:")
+    print(results.drop(columns=["timestamp"]).to_string(index=False))
+
+    if args.csv:
+        results.to_csv(args.csv, mode="a", header=not args.csv.exists(), index=False)
+        print(f"Results appended to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+import numpy as np
+
+
+MIN_CONFIDENCE = 0.6
+EXACT_CONFIDENCE = 1.0
+ALIAS_CONFIDENCE = 0.9
+NGRAM_SIZE = 3
+# A fuzzy match must beat the next player by this much; a cell whose
+# trigrams fit two players almost equally well is not a resolution
+MIN_MARGIN = 0.2
+
+# Cells in the voting table that are not a vote for anyone
+STATUS_MARKERS = re.compile(
+    r"^(banished|murdered|eliminated|immune|none|no vote|winner|runner up|"
+    r"withdrew|left|recruited|traitors ?decision|banishment|vote)\b"
+)
+
+# How scraped cells join several names: ", " or a line break from <br>
+NAME_JOINERS = re.compile(r"\s*[,;\n]\s*")
+
+REVIEW_COLUMNS = [
+    "Season", "target_raw", "vote_count", "rounds", "names_in_cell",
+    "best_candidate", "best_confidence", "runner_up", "runner_up_confidence",
+]
+
+# Letters that NFKD does not decompose into base + combining mark
+EXTRA_FOLDS = str.maketrans({"ø": "o", "ß": "ss", "æ": "ae", "œ": "oe", "ł": "l", "đ": "d", "ð": "d", "þ": "th"})
+
+
+def normalize_name(text):
+    text = str(text)
+    text = re.sub(r"\[.*?\]", "", text)
+    text = text.replace("“", '"').replace("”", '"')
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.translate(EXTRA_FOLDS)
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return text.strip()
+
+
+def name_variants(contestant):
+    # Full name, name without/with the quoted nickname, first, nickname and last name
+    contestant = re.sub(r"\[.*?\]", "", str(contestant)).strip()
+    nickname = re.search(r'["“](.+?)["”]', contestant)
+    plain = re.sub(r'\s*["“].+?["”]\s*', " ", contestant).split()
+
+    full = {normalize_name(contestant), normalize_name(" ".join(plain))}
+    aliases = set()
+    if plain:
+        aliases.add(normalize_name(plain[0]))
+        if len(plain) > 1:
+            aliases.add(normalize_name(plain[-1]))
+    if nickname:
+        aliases.add(normalize_name(nickname.group(1)))
+        if len(plain) > 1:
+            full.add(normalize_name(" ".join([nickname.group(1)] + plain[1:])))
+
+    full.discard("")
+    aliases.discard("")
+    return full, aliases - full
+
+
+def ngrams(text, n=NGRAM_SIZE):
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+class NameIndex:
+    def __init__(self, contestants_df):
+        self.exact = defaultdict(dict)
+        self.aliases = defaultdict(lambda: defaultdict(set))
+        self.forms = defaultdict(list)
+        self.postings = defaultdict(lambda: defaultdict(list))
+        self._cache = {}
+
+        roster = contestants_df[["Season", "Contestant", "player_id"]].drop_duplicates()
+        for season, contestant, player_id in roster.itertuples(index=False):
+            season = str(season)
+            full, aliases = name_variants(contestant)
+            for form in full:
+                self.exact[season][form] = player_id
+            for alias in aliases:
+                self.aliases[season][alias].add(player_id)
+            for form in full | aliases:
+                form_id = len(self.forms[season])
+                grams = ngrams(form)
+                self.forms[season].append((player_id, len(grams)))
+                for gram in grams:
+                    self.postings[season][gram].append(form_id)
+
+    def clean_cell(self, season, text):
+        text = str(text).strip()
+        prefix = f"{season}_"
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+        return normalize_name(text)
+
+    def is_status_marker(self, season, text):
+        cleaned = self.clean_cell(season, text)
+        return not cleaned or cleaned == "nan" or bool(STATUS_MARKERS.match(cleaned))
+
+    def split_names(self, season, text):
+        # Cleaned names in a cell. Older scrapes glued <br>-separated names
+        # together ("Yin LüAnn Lee"), so a lower-to-upper case change also
+        # splits, but only when every piece is a known name on its own.
+        text = str(text).strip()
+        prefix = f"{season}_"
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+        parts = [normalize_name(p) for p in NAME_JOINERS.split(text)]
+        parts = [p for p in parts if p]
+        if len(parts) > 1:
+            return parts
+
+        cuts = [i for i in range(1, len(text)) if text[i - 1].islower() and text[i].isupper()]
+        if cuts:
+            pieces = [normalize_name(text[a:b]) for a, b in zip([0] + cuts, cuts + [len(text)])]
+            if all(self.known_name(season, p) for p in pieces):
+                return pieces
+        return parts
+
+    def known_name(self, season, cleaned):
+        return cleaned in self.exact[season] or len(self.aliases[season].get(cleaned, ())) == 1
+
+    def fuzzy_candidates(self, season, cleaned):
+        # Players ranked by the trigram dice score of their best name form
+        forms = self.forms.get(season)
+        if not forms:
+            return []
+
+        grams = ngrams(cleaned)
+        postings = self.postings[season]
+        hits = [postings[g] for g in grams if g in postings]
+        if not hits:
+            return []
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(forms))
+        sizes = np.fromiter((size for _, size in forms), dtype=float, count=len(forms))
+        dice = 2 * shared / (sizes + len(grams))
+
+        # Collapse forms to players, keeping each player's best form
+        player_scores = {}
+        for form_id in np.flatnonzero(shared):
+            player_id = forms[form_id][0]
+            player_scores[player_id] = max(player_scores.get(player_id, 0.0), dice[form_id])
+
+        return sorted(((p, float(score)) for p, score in player_scores.items()), key=lambda kv: kv[1], reverse=True)
+
+    def best_fuzzy_match(self, season, cleaned):
+        ranked = self.fuzzy_candidates(season, cleaned)
+        if not ranked:
+            return None, 0.0
+        best_id, best_score = ranked[0]
+        if len(ranked) > 1 and best_score - ranked[1][1] < MIN_MARGIN:
+            return None, 0.0
+        return best_id, best_score
+
+    def resolve_name(self, season, cleaned):
+        if cleaned in self.exact[season]:
+            return self.exact[season][cleaned], EXACT_CONFIDENCE
+        if len(self.aliases[season].get(cleaned, ())) == 1:
+            return next(iter(self.aliases[season][cleaned])), ALIAS_CONFIDENCE
+        if cleaned:
+            return self.best_fuzzy_match(season, cleaned)
+        return None, 0.0
+
+    def resolve(self, season, text):
+        season = str(season)
+        key = (season, text)
+        if key in self._cache:
+            return self._cache[key]
+
+        cleaned = self.clean_cell(season, text)
+        result = (None, 0.0)
+        if self.is_status_marker(season, text):
+            pass
+        elif self.known_name(season, cleaned) or len(self.split_names(season, text)) == 1:
+            result = self.resolve_name(season, cleaned)
+        # A cell naming several players is left for review
+
+        self._cache[key] = result
+        return result
+
+
+def resolve_column(votes_df, index, col):
+    # Resolve each distinct (Season, cell) once and map back onto the votes
+    cells = votes_df[["Season", col]].drop_duplicates()
+    resolved = [index.resolve(season, text) for season, text in cells.itertuples(index=False)]
+    lookup = cells.assign(
+        resolved_id=[r[0] for r in resolved],
+        confidence=[r[1] for r in resolved],
+    )
+    lookup["resolved_id"] = lookup["resolved_id"].where(lookup["confidence"] >= MIN_CONFIDENCE)
+    merged = votes_df[["Season", col]].merge(lookup, on=["Season", col], how="left")
+    return merged["resolved_id"].to_numpy(), merged["confidence"].to_numpy()
+
+
+def resolve_votes(votes_df, index):
+    votes = votes_df.copy()
+    votes["target_raw"] = votes["target"]
+    players, _ = resolve_column(votes, index, "player")
+    votes["player"] = pd.Series(players, index=votes.index).fillna(votes["player"])
+    votes["target"], votes["target_confidence"] = resolve_column(votes, index, "target")
+    return votes
+
+
+def unresolved_report(resolved_votes, index):
+    unresolved = resolved_votes[resolved_votes["target"].isna()]
+    if unresolved.empty:
+        return pd.DataFrame(columns=REVIEW_COLUMNS)
+
+    is_marker = [
+        index.is_status_marker(season, text)
+        for season, text in unresolved[["Season", "target_raw"]].itertuples(index=False)
+    ]
+    unresolved = unresolved[~np.array(is_marker, dtype=bool)]
+    if unresolved.empty:
+        return pd.DataFrame(columns=REVIEW_COLUMNS)
+
+    report = (
+        unresolved.groupby(["Season", "target_raw"])
+        .agg(vote_count=("player", "size"), rounds=("round_table", lambda r: sorted(r.unique().tolist())))
+        .reset_index()
+    )
+    candidates = [
+        review_candidates(index, str(season), text)
+        for season, text in report[["Season", "target_raw"]].itertuples(index=False)
+    ]
+    return pd.concat([report, pd.DataFrame(candidates, index=report.index)], axis=1)[REVIEW_COLUMNS]
+
+
+def review_candidates(index, season, text):
+    # What a reviewer needs to fix the cell: every name it holds, or the two
+    # closest players when a single name did not resolve clearly
+    names = index.split_names(season, text)
+    if len(names) > 1:
+        resolved = [index.resolve_name(season, name) for name in names]
+        return {
+            "names_in_cell": len(names),
+            "best_candidate": "; ".join(str(player_id) for player_id, _ in resolved),
+            "best_confidence": min(confidence for _, confidence in resolved),
+            "runner_up": None,
+            "runner_up_confidence": 0.0,
+        }
+
+    ranked = index.fuzzy_candidates(season, index.clean_cell(season, text)) + [(None, 0.0), (None, 0.0)]
+    return {
+        "names_in_cell": len(names),
+        "best_candidate": ranked[0][0],
+        "best_confidence": ranked[0][1],
+        "runner_up": ranked[1][0],
+        "runner_up_confidence": ranked[1][1],
+    }
@@ -0,0 +1,250 @@
+import re
+
+import pandas as pd
+import numpy as np
+
+
+ROOM_GROUP_COLS = ["Inferred_Gender", "ethnicity_group"]
+
+
+BANISHED_CELL = re.compile(r"banished[\s,]*\(\s*(?:episode\s*)?(\d+)\s*\)", re.I)
+
+
+def recorded_banishments(contestants_df, votes_df=None):
+    # With the vote table, each banishment is read from it (see
+    # banishments_from_votes). Without it, the k-th banishment of a season
+    # (by exit episode, then table order) is taken to be the outcome of its
+    # k-th round table, which a tied round with a revote shifts by one.
+    if votes_df is not None:
+        return banishments_from_votes(votes_df, contestants_df)
+
+    banished = contestants_df[contestants_df["is_banished"]].copy()
+    banished["Season"] = banished["Season"].astype(str)
+    banished["table_order"] = np.arange(len(banished))
+    banished = banished.sort_values(["Season", "Episode", "table_order"])
+    banished["round_table"] = banished.groupby("Season").cumcount() + 1
+    return banished[["Season", "round_table", "player_id", "Episode"]].rename(
+        columns={"player_id": "recorded_banished", "Episode": "banishment_episode"}
+    )
+
+
+def banishments_from_votes(votes_df, contestants_df):
+    return banishments_from_calendar(vote_calendar(votes_df), contestants_df)
+
+
+def vote_calendar(votes_df):
+    # What a resolved vote log says about its seasons' calendars: the round
+    # tables held, and per player the first round their row reads
+    # "Banished(Episode n)", that n, and the last round they cast a vote.
+    # Calendars of several vote chunks fold together with merge_vote_calendars.
+    votes = votes_df.assign(
+        Season=votes_df["Season"].astype(str),
+        round_table=votes_df["round_table"].astype(int),
+    )
+    cells = votes["target_raw" if "target_raw" in votes.columns else "target"].astype(str)
+    votes["episode"] = pd.to_numeric(cells.str.extract(BANISHED_CELL)[0])
+    votes["marked"] = votes["round_table"].where(votes["episode"].notna())
+    votes["voted"] = votes["round_table"].where(votes["episode"].isna() & votes["target"].notna())
+
+    players = votes.groupby(["Season", "player"]).agg(
+        first_marked=("marked", "min"), banishment_episode=("episode", "first"), last_voted=("voted", "max")
+    )
+    rounds = votes[["Season", "round_table"]].drop_duplicates()
+    return players, rounds
+
+
+def merge_vote_calendars(parts):
+    players = pd.concat([p for p, _ in parts]).groupby(level=[0, 1]).agg(
+        {"first_marked": "min", "banishment_episode": "first", "last_voted": "max"}
+    )
+    rounds = pd.concat([r for _, r in parts]).drop_duplicates()
+    return players, rounds
+
+
+def banishments_from_calendar(calendar, contestants_df):
+    # A banished player's row reads "Banished(Episode n)" from the round after
+    # the one that banished them. Banished players with no later rounds in the
+    # table (e.g. at the final) fall back to the last round they voted in.
+    players, rounds = calendar
+    players = players.reset_index()
+    held = rounds.groupby("Season")["round_table"].unique().map(np.sort)
+
+    marked = players.dropna(subset=["first_marked"]).copy()
+    marked["round_table"] = [
+        held[season][np.searchsorted(held[season], first) - 1] if first > held[season][0] else np.nan
+        for season, first in zip(marked["Season"], marked["first_marked"])
+    ]
+
+    contestants = contestants_df.assign(Season=contestants_df["Season"].astype(str))
+    banished = contestants[contestants["is_banished"] & ~contestants["player_id"].isin(marked["player"])]
+    last_voted = players[players["player"].isin(banished["player_id"])].dropna(subset=["last_voted"])
+    last_voted = last_voted[["Season", "player", "last_voted"]].rename(columns={"last_voted": "round_table"}).merge(
+        banished[["player_id", "Episode"]].rename(columns={"player_id": "player", "Episode": "banishment_episode"}),
+        on="player",
+    )
+
+    out = pd.concat([marked[["Season", "player", "round_table", "banishment_episode"]], last_voted], ignore_index=True)
+    out = out.dropna(subset=["round_table"])
+    out["round_table"] = out["round_table"].astype(int)
+    out = out.rename(columns={"player": "recorded_banished"})
+    return out.sort_values(["Season", "round_table"], ignore_index=True)[
+        ["Season", "round_table", "recorded_banished", "banishment_episode"]
+    ]
+
+
+def vote_appearances(votes_df):
+    # First and last round each player voted or was voted for. Late entrants
+    # have no entry episode in the contestant tables, and a round with no
+    # banishment shifts the calendar below, so these bound the intervals.
+    appearances = pd.concat([
+        votes_df[["player", "round_table"]],
+        votes_df[["target", "round_table"]].rename(columns={"target": "player"}),
+    ])
+    return appearances.groupby("player")["round_table"].agg(first_round="min", last_round="max").astype(int)
+
+
+def merge_appearances(parts):
+    # Fold vote_appearances of several vote chunks into one
+    combined = pd.concat(parts)
+    return combined.groupby(level=0).agg({"first_round": "min", "last_round": "max"})
+
+
+def exit_rounds(contestants_df, calendar=None):
+    # A banished player leaves after their own round; anyone murdered or
+    # otherwise eliminated misses every round table of their exit episode;
+    # winners and runners-up stay to the end. With a vote_calendar the
+    # banishments and the last round come from the vote log; without one,
+    # round k is held in the episode of the season's k-th banishment.
+    data = contestants_df.copy()
+    data["Season"] = data["Season"].astype(str)
+    if calendar is None:
+        banished = recorded_banishments(data)
+        n_rounds = banished.groupby("Season")["round_table"].max()
+    else:
+        banished = banishments_from_calendar(calendar, data)
+        n_rounds = calendar[1].groupby("Season")["round_table"].max()
+
+    # The episode each round was held in; a final that banishes several
+    # players is still one round
+    schedule = banished.groupby(["Season", "round_table"])["banishment_episode"].first().reset_index()
+
+    exits = np.empty(len(data), dtype=np.int64)
+    for season, idx in data.groupby("Season").indices.items():
+        held = schedule[schedule["Season"] == season]
+        rounds = np.concatenate([[0], held["round_table"].to_numpy()])
+        rows = data.iloc[idx]
+        exits[idx] = rounds[np.searchsorted(held["banishment_episode"].to_numpy(), rows["Episode"].to_numpy(), side="left")]
+        finalist = ~(rows["is_banished"] | rows["is_murdered"]) & rows["Finish"].isin(["winner", "runner-up"])
+        exits[idx[finalist.to_numpy()]] = n_rounds.get(season, rounds[-1])
+
+    banished_round = (
+        banished.drop_duplicates("recorded_banished")
+        .set_index("recorded_banished")["round_table"]
+        .reindex(data["player_id"])
+        .to_numpy(dtype=float)
+    )
+    exits = np.where(data["is_banished"].to_numpy() & ~np.isnan(banished_round), banished_round, exits).astype(np.int64)
+    return exits, n_rounds
+
+
+class RosterIndex:
+    def __init__(self, contestants_df, appearances=None, calendar=None):
+        roster = contestants_df[["Season", "player_id"] + ROOM_GROUP_COLS].copy()
+        roster["Season"] = roster["Season"].astype(str)
+        roster["exit_round"], self.n_rounds = exit_rounds(contestants_df, calendar)
+        roster["entry_round"] = 1
+        if appearances is not None:
+            # Anyone seen at a round table was in the room for it
+            seen = appearances.reindex(roster["player_id"])
+            roster["entry_round"] = seen["first_round"].fillna(1).astype(int).to_numpy()
+            roster["exit_round"] = np.fmax(roster["exit_round"], seen["last_round"].to_numpy()).astype(int)
+            last_seen = roster.groupby("Season")["exit_round"].max()
+            self.n_rounds = np.maximum(self.n_rounds, last_seen.reindex(self.n_rounds.index))
+        if calendar is not None:
+            # No round tables after the last one in the vote log
+            last_held = calendar[1].groupby("Season")["round_table"].max()
+            self.n_rounds = np.fmin(self.n_rounds, last_held.reindex(self.n_rounds.index)).astype(int)
+        # Never at a round table (e.g. eliminated before the first one)
+        self.roster = roster[roster["exit_round"] >= roster["entry_round"]].reset_index(drop=True)
+
+        # Sorted entry/exit arrays per season and per (season, group value):
+        # present at r  <=>  entry <= r  and  exit >= r
+        self.intervals = {}
+        keys = [("Season",)] + [("Season", col) for col in ROOM_GROUP_COLS]
+        for key in keys:
+            for value, g in self.roster.groupby(list(key)):
+                value = value if isinstance(value, tuple) else (value,)
+                self.intervals[(key[1:],) + value] = (
+                    np.sort(g["entry_round"].to_numpy()),
+                    np.sort(g["exit_round"].to_numpy()),
+                )
+
+        # Per season: players ordered by entry and by exit, for members(), and
+        # the group values each column takes, for composition()
+        self.by_entry, self.by_exit, self.group_values = {}, {}, {}
+        for season, g in self.roster.groupby("Season"):
+            ids = g["player_id"].to_numpy()
+            entry, exit_ = g["entry_round"].to_numpy(), g["exit_round"].to_numpy()
+            order = np.argsort(entry, kind="stable")
+            self.by_entry[season] = (entry[order], exit_[order], ids[order])
+            order = np.argsort(exit_, kind="stable")
+            self.by_exit[season] = (exit_[order], entry[order], ids[order])
+            for col in ROOM_GROUP_COLS:
+                self.group_values[(season, col)] = sorted(g[col].dropna().unique())
+
+        spans = self.roster[["Season", "player_id", "entry_round", "exit_round"]]
+        self.spans = {(season, player_id): (entry, exit_) for season, player_id, entry, exit_ in spans.itertuples(index=False)}
+
+    def _count(self, key, round_number):
+        if key not in self.intervals:
+            return 0
+        entries, exits = self.intervals[key]
+        return int(np.searchsorted(entries, round_number, side="right") -
+                   np.searchsorted(exits, round_number, side="left"))
+
+    def room_size(self, season, round_number):
+        return self._count(((), str(season)), round_number)
+
+    def composition(self, season, round_number, col):
+        season = str(season)
+        values = self.group_values.get((season, col), [])
+        return {v: self._count(((col,), season, v), round_number) for v in values}
+
+    def members(self, season, round_number):
+        # Whoever entered by r is a prefix of the entry order and whoever is
+        # still in at r a suffix of the exit order; scan the shorter one
+        season = str(season)
+        if season not in self.by_entry:
+            return []
+        entries, entry_exits, entry_ids = self.by_entry[season]
+        exits, exit_entries, exit_ids = self.by_exit[season]
+        entered = np.searchsorted(entries, round_number, side="right")
+        left = np.searchsorted(exits, round_number, side="left")
+        if entered <= len(exits) - left:
+            return entry_ids[:entered][entry_exits[:entered] >= round_number].tolist()
+        return exit_ids[left:][exit_entries[left:] <= round_number].tolist()
+
+    def is_present(self, season, player_id, round_number):
+        span = self.spans.get((str(season), player_id))
+        return span is not None and span[0] <= round_number <= span[1]
+
+    def sweep(self):
+        # Every season x gender x ethnicity x round head-count at once: +1 at
+        # entry, -1 after exit, cumulative sum along the rounds
+        r = self.roster
+        cell_codes, cells = pd.factorize(pd.MultiIndex.from_frame(r[["Season"] + ROOM_GROUP_COLS]), sort=True)
+        width = int(r["exit_round"].max()) + 2
+
+        diff = np.zeros((len(cells), width), dtype=np.int64)
+        np.add.at(diff, (cell_codes, r["entry_round"].to_numpy()), 1)
+        np.add.at(diff, (cell_codes, r["exit_round"].to_numpy() + 1), -1)
+        counts = diff.cumsum(axis=1)[:, 1:-1]
+
+        rounds = np.arange(1, width - 1)
+        ci, ri = np.meshgrid(np.arange(len(cells)), np.arange(len(rounds)), indexing="ij")
+        out = pd.MultiIndex.from_tuples(cells, names=["Season"] + ROOM_GROUP_COLS)[ci.ravel()].to_frame(index=False)
+        out["round_table"] = rounds[ri.ravel()]
+        out["player_count"] = counts.ravel()
+
+        last_round = self.n_rounds.reindex(out["Season"]).to_numpy()
+        return out[(out["player_count"] > 0) & (out["round_table"] <= last_round)].reset_index(drop=True)
@@ -0,0 +1,297 @@
+import pandas as pd
+import numpy as np
+
+from traitors_banishment_analysis import (
+    DATA_FILES_PATTERN,
+    VOTES_FILES_PATTERN,
+    OUTPUT_DIR,
+    load_and_prepare_all_seasons,
+    load_votes,
+    enrich_votes_with_demographics,
+)
+from name_resolver import NameIndex, resolve_column, resolve_votes
+from roster_index import recorded_banishments
+
+
+VOTER_GROUP_COLS = ["voter_gender", "voter_ethnicity"]
+
+
+def encode_votes(votes_enriched_df, target_col="target"):
+    # Rounds become rows, each season's targets become local columns 0..T-1
+    votes = votes_enriched_df.dropna(subset=[target_col])
+    season = votes["Season"].astype(str).to_numpy()
+    rounds = votes["round_table"].astype(int).to_numpy()
+
+    round_keys = pd.MultiIndex.from_arrays([season, rounds], names=["Season", "round_table"])
+    round_codes, round_index = pd.factorize(round_keys, sort=True)
+
+    target_codes, targets = pd.factorize(votes[target_col], sort=True)
+    target_season = pd.Series(season).groupby(target_codes).first()
+    local = target_season.groupby(target_season).cumcount().to_numpy()
+    width = int(local.max()) + 1 if len(local) else 0
+
+    return {
+        "votes": votes,
+        "round_codes": round_codes,
+        "round_index": pd.MultiIndex.from_tuples(round_index, names=["Season", "round_table"]),
+        "target_local": local[target_codes],
+        "local_to_target": _local_lookup(target_season, targets, width),
+        "width": width,
+    }
+
+
+def _local_lookup(target_season, targets, width):
+    # (season, local code) -> player_id, for turning argmaxes back into names
+    seasons, season_codes = np.unique(target_season.to_numpy(), return_inverse=True)
+    local = target_season.groupby(target_season).cumcount().to_numpy()
+    lookup = np.full((len(seasons), max(width, 1)), None, dtype=object)
+    lookup[season_codes, local] = np.asarray(targets, dtype=object)
+    return pd.Series(range(len(seasons)), index=seasons), lookup
+
+
+def plurality(counts):
+    top = counts.max(axis=-1)
+    n_top = (counts == top[..., np.newaxis]).sum(axis=-1)
+    runner_up = np.where(counts < top[..., np.newaxis], counts, 0).max(axis=-1)
+    return top, n_top, counts.argmax(axis=-1), runner_up
+
+
+def round_vote_counts(encoded):
+    r = len(encoded["round_index"])
+    w = encoded["width"]
+    flat = encoded["round_codes"] * w + encoded["target_local"]
+    return np.bincount(flat, minlength=r * w).reshape(r, w)
+
+
+def _names(encoded, local_codes, round_rows=None):
+    season_pos, lookup = encoded["local_to_target"]
+    seasons = encoded["round_index"].get_level_values("Season")
+    if round_rows is not None:
+        seasons = seasons[round_rows]
+    return lookup[season_pos.reindex(seasons).to_numpy(), local_codes]
+
+
+def revote_rounds(encoded, counts, top, is_tie):
+    # A tie followed by a round whose targets are all among the tied players
+    # is that tie's revote, not a new round table. A tie already settled in
+    # its own second_turn column has no revote round after it.
+    index = encoded["round_index"]
+    seasons = index.get_level_values("Season").to_numpy()
+    rounds = index.get_level_values("round_table").to_numpy()
+    tied = counts == top[:, np.newaxis]
+
+    votes = encoded["votes"]
+    settled = np.zeros(len(counts), dtype=bool)
+    if "second_turn" in votes.columns:
+        has_second_turn = votes["second_turn"].notna().to_numpy()
+        settled[np.unique(encoded["round_codes"][has_second_turn])] = True
+
+    is_revote = np.zeros(len(counts), dtype=bool)
+    follows = (seasons[1:] == seasons[:-1]) & (rounds[1:] == rounds[:-1] + 1) & is_tie[:-1] & ~settled[:-1]
+    only_tied = ~((counts[1:] > 0) & ~tied[:-1]).any(axis=1) & (counts[1:].sum(axis=1) > 0)
+    is_revote[1:] = follows & only_tied
+    return is_revote
+
+
+def revote_tied_players(votes_enriched_df):
+    # (Season, round_table) of each revote round -> the tied players it was between
+    encoded = encode_votes(votes_enriched_df)
+    if encoded["width"] == 0:
+        return {}
+    counts = round_vote_counts(encoded)
+    top, n_top, _, _ = plurality(counts)
+    is_revote = revote_rounds(encoded, counts, top, n_top > 1)
+
+    tied = {}
+    for i in np.flatnonzero(is_revote):
+        local = np.flatnonzero(counts[i - 1] == top[i - 1])
+        tied[encoded["round_index"][i]] = _names(encoded, local, np.full(len(local), i - 1)).tolist()
+    return tied
+
+
+def round_outcomes(votes_enriched_df, contestants_df, name_index=None, votes_df=None):
+    encoded = encode_votes(votes_enriched_df)
+    if encoded["width"] == 0:
+        return pd.DataFrame()
+
+    counts = round_vote_counts(encoded)
+    top, n_top, winner, runner_up = plurality(counts)
+    is_tie = n_top > 1
+    is_revote = revote_rounds(encoded, counts, top, is_tie)
+
+    out = encoded["round_index"].to_frame(index=False)
+    out["total_votes"] = counts.sum(axis=1)
+    out["plurality_target"] = np.where(is_tie, None, _names(encoded, winner))
+    out["plurality_votes"] = top
+    out["runner_up_votes"] = np.where(is_tie, top, runner_up)
+    out["is_tie"] = is_tie
+
+    tied_rows, tied_local = np.nonzero(counts == top[:, np.newaxis])
+    tied = pd.Series(_names(encoded, tied_local, tied_rows)).groupby(tied_rows).agg(sorted)
+    out["tied_targets"] = tied.where(is_tie[tied.index]).reindex(out.index)
+
+    out["is_revote"] = is_revote
+
+    # A tie is settled by its second_turn column or by the revote round after it
+    next_round = pd.Series(np.append(out["plurality_target"].to_numpy()[1:], None), index=out.index)
+    revote_round = pd.Series(np.append(is_revote[1:], False), index=out.index)
+    out["revote_target"] = _revote_winners(votes_enriched_df, contestants_df, name_index, out)
+    out["revote_target"] = out["revote_target"].fillna(next_round.where(revote_round))
+    out["outcome"] = out["plurality_target"].fillna(out["revote_target"])
+
+    if votes_df is not None:
+        if name_index is None:
+            name_index = NameIndex(contestants_df)
+        recorded = recorded_banishments(contestants_df, resolve_votes(votes_df, name_index))
+    else:
+        recorded = recorded_banishments(contestants_df)
+    # The final round table can banish several players, so each round keeps
+    # the list of everyone recorded as banished there
+    recorded = recorded.groupby(["Season", "round_table"]).agg(
+        recorded_banished=("recorded_banished", sorted),
+        banishment_episode=("banishment_episode", "first"),
+    ).reset_index()
+    out = out.merge(recorded, on=["Season", "round_table"], how="left")
+    out["matches_record"] = [
+        isinstance(b, list) and o in b for o, b in zip(out["outcome"], out["recorded_banished"])
+    ]
+    out["record_in_tie"] = [
+        isinstance(t, list) and isinstance(b, list) and bool(set(t) & set(b))
+        for t, b in zip(out["tied_targets"], out["recorded_banished"])
+    ]
+    return out
+
+
+def _revote_winners(votes_enriched_df, contestants_df, name_index, out):
+    # A tie goes to a second vote between the tied players (second_turn column)
+    if "second_turn" not in votes_enriched_df.columns or not votes_enriched_df["second_turn"].notna().any():
+        return pd.Series(None, index=out.index, dtype=object)
+
+    if name_index is None:
+        name_index = NameIndex(contestants_df)
+    revotes = votes_enriched_df[votes_enriched_df["second_turn"].notna()].copy()
+    revotes["revote"], _ = resolve_column(revotes, name_index, "second_turn")
+
+    encoded = encode_votes(revotes, "revote")
+    if encoded["width"] == 0:
+        return pd.Series(None, index=out.index, dtype=object)
+
+    _, n_top, winner, _ = plurality(round_vote_counts(encoded))
+    winners = pd.Series(np.where(n_top > 1, None, _names(encoded, winner)), index=encoded["round_index"])
+    keys = pd.MultiIndex.from_frame(out[["Season", "round_table"]])
+    return pd.Series(winners.reindex(keys).to_numpy(), index=out.index)
+
+
+def leave_one_out(votes_enriched_df):
+    # Closed form per vote: removing one vote only lowers its own target's
+    # count, so whether the outcome changes depends only on that target's
+    # count relative to the round's top and runner-up counts.
+    encoded = encode_votes(votes_enriched_df)
+    if encoded["width"] == 0:
+        return pd.DataFrame()
+
+    counts = round_vote_counts(encoded)
+    top, n_top, winner, runner_up = plurality(counts)
+    r, t = encoded["round_codes"], encoded["target_local"]
+    own = counts[r, t]
+
+    at_top = own == top[r]
+    # Unique leader loses a vote and drops into a tie with the runner-up
+    breaks_lead = at_top & (n_top[r] == 1) & (top[r] - 1 == runner_up[r])
+    # One of exactly two tied leaders loses a vote, the other now wins outright
+    breaks_tie = at_top & (n_top[r] == 2)
+    # Sole vote in the room removed leaves no outcome at all
+    empties_room = counts.sum(axis=1)[r] == 1
+
+    votes = encoded["votes"]
+    out = pd.DataFrame({
+        "Season": votes["Season"].astype(str).to_numpy(),
+        "round_table": votes["round_table"].astype(int).to_numpy(),
+        "player": votes["player"].to_numpy(),
+        "target": votes["target"].to_numpy(),
+        "voter_gender": votes["voter_gender"].to_numpy(),
+        "voter_ethnicity": votes["voter_ethnicity"].to_numpy(),
+        "target_votes": own,
+        "pivotal": breaks_lead | breaks_tie | empties_room,
+    })
+    return out
+
+
+def leave_group_out(votes_enriched_df):
+    encoded = encode_votes(votes_enriched_df)
+    if encoded["width"] == 0:
+        return pd.DataFrame()
+
+    counts = round_vote_counts(encoded)
+    top, n_top, winner, _ = plurality(counts)
+    base_outcome = np.where(n_top > 1, -1, winner)
+    votes = encoded["votes"]
+    r, w = len(encoded["round_index"]), encoded["width"]
+
+    rows = []
+    for group_col in VOTER_GROUP_COLS:
+        group_codes, groups = pd.factorize(votes[group_col].astype(str), sort=True)
+        g = len(groups)
+
+        # (round, group, target) counts in one bincount, then every
+        # round x group counterfactual at once
+        flat = (encoded["round_codes"] * g + group_codes) * w + encoded["target_local"]
+        by_group = np.bincount(flat, minlength=r * g * w).reshape(r, g, w)
+        remaining = counts[:, np.newaxis, :] - by_group
+
+        cf_top, cf_n_top, cf_winner, _ = plurality(remaining)
+        empty = remaining.sum(axis=-1) == 0
+        cf_outcome = np.where(empty | (cf_n_top > 1), -1, cf_winner)
+
+        ri, gi = np.meshgrid(np.arange(r), np.arange(g), indexing="ij")
+        ri, gi = ri.ravel(), gi.ravel()
+        cf = cf_outcome.ravel()
+        df = encoded["round_index"][ri].to_frame(index=False)
+        df["group_type"] = group_col
+        df["group_value"] = np.asarray(groups)[gi]
+        df["votes_removed"] = by_group.sum(axis=-1).ravel()
+        df["plurality_target"] = np.where(base_outcome[ri] < 0, None, _names(encoded, winner[ri], ri))
+        df["counterfactual_target"] = np.where(cf < 0, None, _names(encoded, np.maximum(cf, 0), ri))
+        df["counterfactual_is_tie"] = (cf_n_top.ravel() > 1) & ~empty.ravel()
+        df["outcome_changed"] = cf != base_outcome[ri]
+        rows.append(df[df["votes_removed"] > 0])
+
+    return pd.concat(rows, ignore_index=True)
+
+
+def main():
+    OUTPUT_DIR.mkdir(exist_ok=True)
+
+    try:
+        df = load_and_prepare_all_seasons(DATA_FILES_PATTERN)
+        votes_df = load_votes(VOTES_FILES_PATTERN)
+    except FileNotFoundError as e:
+        print(e)
+        return
+
+    name_index = NameIndex(df)
+    votes_enriched = enrich_votes_with_demographics(votes_df, df, name_index)
+
+    outcomes = round_outcomes(votes_enriched, df, name_index, votes_df)
+    influence = leave_one_out(votes_enriched)
+    group_cf = leave_group_out(votes_enriched)
+
+    checked = outcomes["recorded_banished"].notna()
+    print(f"\nRound outcomes matching the recorded banishment: "
+          f"{outcomes.loc[checked, 'matches_record'].sum()} of {checked.sum()}")
+    print(f"Ties: {outcomes['is_tie'].sum()}, pivotal votes: {influence['pivotal'].sum()}")
+    print("\nRounds whose outcome changes when a voter group is removed:")
+    print(group_cf.groupby(["group_type", "group_value"])["outcome_changed"].sum())
+
+    outcomes.to_csv(OUTPUT_DIR / "round_outcomes.csv", index=False)
+    influence.to_csv(OUTPUT_DIR / "voter_influence.csv", index=False)
+    group_cf.to_csv(OUTPUT_DIR / "group_counterfactuals.csv", index=False)
+
+    outcomes.to_json(OUTPUT_DIR / "round_outcomes.json", orient="records")
+    influence.to_json(OUTPUT_DIR / "voter_influence.json", orient="records")
+    group_cf.to_json(OUTPUT_DIR / "group_counterfactuals.json", orient="records")
+
+    print(f"Files saved in: {OUTPUT_DIR.resolve()}")
+
+if __name__ == "__main__":
+    main()
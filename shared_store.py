@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+OUTPUT_DIR = Path("outputs")
+STORE_DIR = OUTPUT_DIR / "store"
+MANIFEST = "manifest.json"
+LOCK = ".build.lock"
+# A reader can lose the race with a rebuild between reading the manifest and
+# opening the files it names; it then starts over from the new manifest
+ATTACH_RETRIES = 3
+
+# The dashboard tables, in the order app.py unpacks them
+DASHBOARD_TABLES = {
+    "age": "age_survival_stats",
+    "base": "baseline_composition",
+    "early": "early_banishment_stats",
+    "surv": "survival_stats",
+    "finalist": "finalist_composition",
+    "votes": "early_vote_composition",
+    "baseline": "baseline_rounds",
+}
+
+# Per-process handle on the attached store, keyed by manifest version
+_attached = {}
+
+
+def _encode_column(series):
+    # Numbers and booleans are stored as they are; strings become integer
+    # codes plus a category list, so every column is a flat fixed-width array
+    if series.dtype.kind in "biuf":
+        return np.ascontiguousarray(series.to_numpy()), None
+    codes, categories = pd.factorize(series, sort=True)
+    width = np.int8 if len(categories) < 2**7 else np.int16 if len(categories) < 2**15 else np.int32
+    return codes.astype(width), [str(c) for c in categories]
+
+
+def _lock(f):
+    if os.name == "nt":
+        import msvcrt
+        while True:
+            try:
+                # LK_LOCK itself gives up after about 10 seconds
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    import fcntl
+    fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def _unlock(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def _store_lock(store_dir):
+    # One builder at a time per store directory, across processes. The OS
+    # drops the lock if the builder dies, so a crash never leaves it held.
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    with open(store_dir / LOCK, "w") as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def _read_manifest(store_dir):
+    manifest_path = Path(store_dir) / MANIFEST
+    return json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+
+
+def _build(tables, output_dir, store_dir):
+    # Each build goes to a fresh version directory and the manifest is swapped
+    # in atomically, so readers never see a half-written store. The version
+    # it replaces is kept for readers that read the old manifest just before
+    # the swap; anything older is removed. Callers hold the store lock.
+    store_dir = Path(store_dir)
+    previous = _read_manifest(store_dir)
+    version_dir = Path(tempfile.mkdtemp(prefix="v", dir=store_dir))
+
+    manifest = {"version": version_dir.name, "built": time.time(), "tables": {}}
+    for name, stem in tables.items():
+        # Stamped before reading: a CSV rewritten mid-build no longer matches
+        # its stamp, so the next staleness check picks it up
+        source = Path(output_dir) / f"{stem}.csv"
+        stamp = _source_stamp(source)
+        df = pd.read_csv(source)
+        columns = []
+        for i, col in enumerate(df.columns):
+            values, categories = _encode_column(df[col])
+            np.save(version_dir / f"{name}.{i}.npy", values)
+            columns.append({"name": col, "categories": categories})
+        manifest["tables"][name] = {"source": source.name, "stamp": stamp, "rows": len(df), "columns": columns}
+
+    tmp = store_dir / f"{MANIFEST}.{os.getpid()}"
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, store_dir / MANIFEST)
+
+    keep = {version_dir.name, previous["version"] if previous else None}
+    for old in store_dir.glob("v*"):
+        if old.is_dir() and old.name not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+    print(f"Shared store built in {version_dir}")
+    return manifest
+
+
+def build_store(tables=DASHBOARD_TABLES, output_dir=OUTPUT_DIR, store_dir=STORE_DIR):
+    with _store_lock(store_dir):
+        return _build(tables, output_dir, store_dir)
+
+
+def _source_stamp(path):
+    stat = Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def store_is_stale(tables=DASHBOARD_TABLES, output_dir=OUTPUT_DIR, store_dir=STORE_DIR):
+    # Stale unless every source CSV has the size and mtime it had when read
+    manifest = _read_manifest(store_dir)
+    if manifest is None or set(manifest["tables"]) != set(tables):
+        return True
+    for name, stem in tables.items():
+        meta = manifest["tables"][name]
+        source = Path(output_dir) / f"{stem}.csv"
+        if meta["source"] != source.name or meta.get("stamp") != _source_stamp(source):
+            return True
+    return False
+
+
+def attach_store(store_dir=STORE_DIR):
+    # Read-only DataFrames over memory-mapped column files. The OS page cache
+    # holds one copy of the data however many processes attach to it, and
+    # within a process every caller gets the same frames.
+    store_dir = Path(store_dir)
+    for attempt in range(ATTACH_RETRIES):
+        manifest = _read_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No shared store manifest in {store_dir}")
+        key = (str(store_dir.resolve()), manifest["version"])
+        if key in _attached:
+            return _attached[key]
+        try:
+            tables = _map_tables(store_dir / manifest["version"], manifest)
+        except FileNotFoundError:
+            # Two rebuilds since the manifest was read removed its version
+            if attempt == ATTACH_RETRIES - 1:
+                raise
+            continue
+        _attached.clear()
+        _attached[key] = tables
+        return tables
+
+
+def _map_tables(version_dir, manifest):
+    tables = {}
+    for name, meta in manifest["tables"].items():
+        columns = {}
+        for i, col in enumerate(meta["columns"]):
+            values = np.asarray(np.load(version_dir / f"{name}.{i}.npy", mmap_mode="r"))
+            if col["categories"] is not None:
+                values = pd.Categorical.from_codes(values, categories=pd.Index(col["categories"]), validate=False)
+            columns[col["name"]] = values
+        tables[name] = pd.DataFrame(columns, copy=False)
+    return tables
+
+
+def load_shared_tables(tables=DASHBOARD_TABLES, output_dir=OUTPUT_DIR, store_dir=STORE_DIR):
+    # Cheap when nothing changed: a few stat calls and a cached attach. When
+    # the CSVs are newer, the first process to take the lock rebuilds and the
+    # others find the store fresh once they get it.
+    if store_is_stale(tables, output_dir, store_dir):
+        with _store_lock(store_dir):
+            if store_is_stale(tables, output_dir, store_dir):
+                _build(tables, output_dir, store_dir)
+    return attach_store(store_dir)
+
+
+def select(df, mask):
+    # A session's own copy of just the rows it shows, with string columns
+    # decoded back to what read_csv gives, so downstream code is unchanged
+    out = df[np.asarray(mask, dtype=bool)].copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(out[col].cat.categories.dtype)
+    return out
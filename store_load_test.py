@@ -0,0 +1,146 @@
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from shared_store import DASHBOARD_TABLES, OUTPUT_DIR, build_store, attach_store, select
+
+
+SESSION_COUNTS = [1, 10, 50]
+# Copies of every season, to stand in for many franchises being loaded
+SCALE = 500
+SEASONS_PER_SESSION = 3
+MODES = ["per_session", "shared"]
+
+
+def memory_mb():
+    # Resident and proportional set size of this process. RSS counts shared
+    # mmap pages in full in every process, PSS splits them between processes.
+    rollup = Path("/proc/self/smaps_rollup")
+    if rollup.exists():
+        fields = {}
+        for line in rollup.read_text().splitlines()[1:]:
+            key, value = line.split(":", 1)
+            fields[key] = int(value.split()[0])
+        return fields["Rss"] / 1024, fields["Pss"] / 1024
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return rss, rss
+
+
+def scale_outputs(output_dir, scaled_dir, scale):
+    # Every dashboard table replicated with relabelled seasons
+    for stem in DASHBOARD_TABLES.values():
+        df = pd.read_csv(Path(output_dir) / f"{stem}.csv")
+        season_col = "season" if "season" in df.columns else "Season"
+        copies = [df] + [df.assign(**{season_col: df[season_col].astype(str) + f"#{k}"}) for k in range(1, scale)]
+        pd.concat(copies, ignore_index=True).to_csv(Path(scaled_dir) / f"{stem}.csv", index=False)
+
+
+def load_per_session(csv_dir):
+    # What app.py did before: every run reads its own copy of every table
+    return {name: pd.read_csv(Path(csv_dir) / f"{stem}.csv") for name, stem in DASHBOARD_TABLES.items()}
+
+
+def session_view(tables, seasons, round_number):
+    # The frames one app.py run derives from its selection
+    def filter_s(df):
+        return select(df, df["season"].astype(str).isin(seasons))
+
+    view = {name: filter_s(tables[name]) for name in ["age", "base", "early", "surv"]}
+    finalist, votes, baseline = tables["finalist"], tables["votes"], tables["baseline"]
+    view["finalist"] = select(finalist, finalist["season"].astype(str).isin(seasons) & (finalist["season"] != "all"))
+    view["votes"] = select(votes, (votes["round_table"] == round_number) & votes["Season"].astype(str).isin(seasons))
+    view["baseline"] = select(baseline, (baseline["Round"] == round_number) & baseline["Season"].astype(str).isin(seasons))
+    return view
+
+
+def run_sessions(mode, n_sessions, csv_dir, store_dir, seed=0):
+    gc.collect()
+    start_rss, start_pss = memory_mb()
+    rng = np.random.default_rng(seed)
+
+    sessions = []
+    for _ in range(n_sessions):
+        tables = load_per_session(csv_dir) if mode == "per_session" else attach_store(store_dir)
+        seasons = sorted(tables["age"]["season"].astype(str).unique())
+        selection = list(rng.choice(seasons, SEASONS_PER_SESSION, replace=False))
+        round_number = int(rng.choice(np.unique(tables["votes"]["round_table"])))
+        state = {"selection": selection, "round": round_number, "view": session_view(tables, selection, round_number)}
+        if mode == "per_session":
+            state["tables"] = tables
+        sessions.append(state)
+
+    gc.collect()
+    rss, pss = memory_mb()
+    return {"rss_mb": rss, "pss_mb": pss, "start_rss_mb": start_rss, "start_pss_mb": start_pss}
+
+
+def child_run(mode, n_sessions, processes, csv_dir, store_dir):
+    # Sessions spread over worker processes, memory summed over all of them
+    per_process = [len(part) for part in np.array_split(np.arange(n_sessions), processes) if len(part)]
+    cmds = [
+        [sys.executable, __file__, "--child", mode, str(n), str(csv_dir), str(store_dir)]
+        for n in per_process
+    ]
+    procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) for cmd in cmds]
+    results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    return {
+        "mode": mode,
+        "sessions": n_sessions,
+        "processes": len(per_process),
+        "rss_mb": sum(r["rss_mb"] for r in results),
+        "pss_mb": sum(r["pss_mb"] for r in results),
+        "session_rss_mb": sum(r["rss_mb"] - r["start_rss_mb"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS of simulated dashboard sessions, per-session copies vs the shared store.")
+    parser.add_argument("--scale", type=int, default=SCALE)
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to spread the sessions over")
+    parser.add_argument("--csv", type=Path, help="append results to this CSV to track them over time")
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "N", "CSV_DIR", "STORE_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, n, csv_dir, store_dir = args.child
+        print(json.dumps(run_sessions(mode, int(n), csv_dir, store_dir)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir, store_dir = Path(tmp) / "outputs", Path(tmp) / "store"
+        csv_dir.mkdir()
+        scale_outputs(OUTPUT_DIR, csv_dir, args.scale)
+        build_store(output_dir=csv_dir, store_dir=store_dir)
+        size_mb = sum(f.stat().st_size for f in store_dir.rglob("*.npy")) / 1e6
+        print(f"Scale {args.scale}: {sum(1 for _ in csv_dir.iterdir())} tables, {size_mb:.1f} MB of column data")
+
+        rows = []
+        for mode in MODES:
+            for n in SESSION_COUNTS:
+                row = child_run(mode, n, args.processes, csv_dir, store_dir)
+                print(f"{mode:>12} {n:>3} sessions / {row['processes']} process(es): "
+                      f"RSS {row['rss_mb']:.0f} MB, PSS {row['pss_mb']:.0f} MB, "
+                      f"sessions added {row['session_rss_mb']:.0f} MB")
+                rows.append(row)
+
+    results = pd.DataFrame(rows)
+    results.insert(0, "timestamp", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    results.insert(1, "scale", args.scale)
+    print("\nSummary:")
+    print(results.drop(columns=["timestamp"]).to_string(index=False))
+
+    if args.csv:
+        results.to_csv(args.csv, mode="a", header=not args.csv.exists(), index=False)
+        print(f"Results appended to {args.csv}")
+
+if __name__ == "__main__":
+    main()
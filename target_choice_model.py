@@ -0,0 +1,230 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from traitors_banishment_analysis import (
+    DATA_FILES_PATTERN,
+    VOTES_FILES_PATTERN,
+    OUTPUT_DIR,
+    load_and_prepare_all_seasons,
+    load_votes,
+    enrich_votes_with_demographics,
+)
+from name_resolver import NameIndex, resolve_votes
+from roster_index import RosterIndex, vote_appearances, vote_calendar
+from round_outcomes import revote_tied_players
+
+
+AGE_BINS = [0, 30, 45, 60, 100]
+AGE_LABELS = ["<30", "30-44", "45-59", "60+"]
+
+# Reference categories: male, white, <30
+FEATURES = ["female", "person_of_color", "age_30_44", "age_45_59", "age_60_plus"]
+
+N_BOOTSTRAP = 200
+MAX_ITER = 50
+TOLERANCE = 1e-8
+
+
+def choice_attributes(contestants_df):
+    data = contestants_df.drop_duplicates(subset="player_id").set_index("player_id")
+    age_group = pd.cut(data["Age"], bins=AGE_BINS, labels=AGE_LABELS)
+
+    attrs = pd.DataFrame(index=data.index)
+    attrs["female"] = data["Inferred_Gender"].map({"female": 1.0, "male": 0.0})
+    attrs["person_of_color"] = data["ethnicity_group"].map({"person_of_color": 1.0, "white": 0.0})
+    for label, col in zip(AGE_LABELS[1:], FEATURES[2:]):
+        attrs[col] = (age_group == label).astype(float).where(age_group.notna())
+    return attrs[FEATURES]
+
+
+def build_choice_sets(votes_enriched_df, contestants_df, season=None, calendar=None):
+    # Every vote is a choice among the players in the room at that round
+    # table, excluding the voter. The room is the RosterIndex roster, the same
+    # one the round baselines count, except in a revote, where the only
+    # choices are the players tied in the round before.
+    # Rooms are padded to the largest one so the whole dataset is one array.
+    votes = votes_enriched_df
+    if season is not None:
+        votes = votes[votes["Season"] == season]
+    votes = votes[["Season", "round_table", "player", "target"]].copy()
+    votes["Season"] = votes["Season"].astype(str)
+    votes["round_table"] = votes["round_table"].astype(int)
+
+    roster = RosterIndex(contestants_df, vote_appearances(votes_enriched_df), calendar)
+    revotes = revote_tied_players(votes_enriched_df)
+    rounds = votes[["Season", "round_table"]].drop_duplicates()
+    room = pd.DataFrame(
+        [
+            (s, r, player)
+            for s, r in rounds.itertuples(index=False)
+            for player in revotes.get((s, r)) or roster.members(s, r)
+        ],
+        columns=["Season", "round_table", "player"],
+    )
+
+    attrs = choice_attributes(contestants_df)
+    room = room[room["player"].isin(attrs.dropna().index)]
+
+    round_keys = ["Season", "round_table"]
+    room["round_code"] = room.groupby(round_keys, sort=True).ngroup()
+    room["position"] = room.groupby("round_code").cumcount()
+    n_rounds = room["round_code"].max() + 1
+    width = room["position"].max() + 1
+
+    member_x = np.zeros((n_rounds, width, len(FEATURES)))
+    member_mask = np.zeros((n_rounds, width), dtype=bool)
+    member_x[room["round_code"], room["position"]] = attrs.loc[room["player"]].to_numpy()
+    member_mask[room["round_code"], room["position"]] = True
+
+    positions = room.set_index(round_keys + ["player"])["position"]
+    round_codes = room.drop_duplicates("round_code").set_index(round_keys)["round_code"]
+
+    votes["round_code"] = round_codes.reindex(pd.MultiIndex.from_frame(votes[round_keys])).to_numpy()
+    votes["chosen"] = positions.reindex(pd.MultiIndex.from_frame(votes[round_keys + ["target"]])).to_numpy()
+    votes["self"] = positions.reindex(pd.MultiIndex.from_frame(votes[round_keys + ["player"]])).to_numpy()
+    votes = votes.dropna(subset=["round_code", "chosen"])
+    votes = votes[votes["chosen"] != votes["self"]]
+
+    rc = votes["round_code"].astype(int).to_numpy()
+    mask = member_mask[rc].copy()
+    voter_in_room = votes["self"].notna().to_numpy()
+    mask[np.flatnonzero(voter_in_room), votes["self"][voter_in_room].astype(int).to_numpy()] = False
+
+    return {
+        "X": member_x[rc],
+        "mask": mask,
+        "chosen": votes["chosen"].astype(int).to_numpy(),
+        "clusters": pd.factorize(votes["player"])[0],
+        "features": FEATURES,
+    }
+
+
+def log_likelihood(beta, X, mask, chosen, weights=None):
+    n = len(chosen)
+    if weights is None:
+        weights = np.ones(n)
+
+    util = np.where(mask, X @ beta, -np.inf)
+    util -= util.max(axis=1, keepdims=True)
+    expu = np.exp(util)
+    p = expu / expu.sum(axis=1, keepdims=True)
+
+    rows = np.arange(n)
+    ll = weights @ (util[rows, chosen] - np.log(expu.sum(axis=1)))
+
+    x_bar = np.einsum("nj,njk->nk", p, X)
+    grad = weights @ (X[rows, chosen] - x_bar)
+
+    # -sum_n w_n * (E[x x'] - E[x] E[x]')
+    exx = np.einsum("n,nj,njk,njl->kl", weights, p, X, X, optimize=True)
+    hess = -(exx - np.einsum("n,nk,nl->kl", weights, x_bar, x_bar))
+    return ll, grad, hess
+
+
+def fit_conditional_logit(X, mask, chosen, weights=None, start=None, max_iter=MAX_ITER, tol=TOLERANCE):
+    # Newton-Raphson with step halving; the log-likelihood is concave
+    beta = np.zeros(X.shape[2]) if start is None else np.asarray(start, dtype=float)
+    ll, grad, hess = log_likelihood(beta, X, mask, chosen, weights)
+    for _ in range(max_iter):
+        step = np.linalg.solve(hess - 1e-10 * np.eye(len(beta)), -grad)
+        t = 1.0
+        while True:
+            new_ll, new_grad, new_hess = log_likelihood(beta + t * step, X, mask, chosen, weights)
+            if new_ll >= ll - 1e-12 or t < 1e-6:
+                break
+            t /= 2
+        beta = beta + t * step
+        converged = abs(new_ll - ll) < tol * (1 + abs(ll))
+        ll, grad, hess = new_ll, new_grad, new_hess
+        if converged:
+            break
+    return beta, ll, hess
+
+
+_worker_data = {}
+
+
+def _init_worker(X, mask, chosen, clusters, start):
+    _worker_data.update(X=X, mask=mask, chosen=chosen, clusters=clusters, start=start)
+
+
+def _bootstrap_batch(seeds):
+    # Cluster bootstrap by voter, expressed as frequency weights so the
+    # padded arrays never get copied; each refit starts from the full-sample fit
+    d = _worker_data
+    n_clusters = d["clusters"].max() + 1
+    betas = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        draws = np.bincount(rng.integers(0, n_clusters, n_clusters), minlength=n_clusters)
+        beta, _, _ = fit_conditional_logit(d["X"], d["mask"], d["chosen"], draws[d["clusters"]].astype(float), d["start"])
+        betas.append(beta)
+    return betas
+
+
+def bootstrap_standard_errors(choice_sets, start, n_boot=N_BOOTSTRAP, workers=None, seed=0):
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).generate_state(n_boot)
+    batches = [b for b in np.array_split(seeds, workers) if len(b)]
+    args = (choice_sets["X"], choice_sets["mask"], choice_sets["chosen"], choice_sets["clusters"], start)
+
+    with ProcessPoolExecutor(max_workers=len(batches), initializer=_init_worker, initargs=args) as pool:
+        betas = np.array([beta for batch in pool.map(_bootstrap_batch, batches) for beta in batch])
+    return betas
+
+
+def target_choice_model(votes_enriched_df, contestants_df, season=None, n_boot=N_BOOTSTRAP, workers=None, calendar=None):
+    choice_sets = build_choice_sets(votes_enriched_df, contestants_df, season, calendar)
+    beta, ll, hess = fit_conditional_logit(choice_sets["X"], choice_sets["mask"], choice_sets["chosen"])
+    betas = bootstrap_standard_errors(choice_sets, beta, n_boot, workers)
+
+    summary = pd.DataFrame({
+        "attribute": choice_sets["features"],
+        "coef": beta,
+        "odds_ratio": np.exp(beta),
+        "se_model": np.sqrt(np.diag(np.linalg.inv(-hess))),
+        "se_bootstrap": betas.std(axis=0, ddof=1),
+        "ci_low": np.percentile(betas, 2.5, axis=0),
+        "ci_high": np.percentile(betas, 97.5, axis=0),
+    })
+    summary["z"] = summary["coef"] / summary["se_bootstrap"]
+    summary["n_choices"] = len(choice_sets["chosen"])
+    summary["n_bootstrap"] = n_boot
+    summary["log_likelihood"] = ll
+    summary["season"] = "all" if season is None else season
+    return summary
+
+
+def main():
+    OUTPUT_DIR.mkdir(exist_ok=True)
+
+    try:
+        df = load_and_prepare_all_seasons(DATA_FILES_PATTERN)
+        votes_df = load_votes(VOTES_FILES_PATTERN)
+    except FileNotFoundError as e:
+        print(e)
+        return
+
+    name_index = NameIndex(df)
+    votes_enriched = enrich_votes_with_demographics(votes_df, df, name_index)
+    # Rooms end where the vote log says, as in the round baselines
+    calendar = vote_calendar(resolve_votes(votes_df, name_index))
+
+    # Also fit without the celebrity season, as in the dashboard analysis
+    civilian = votes_enriched[~votes_enriched["Season"].astype(str).str.startswith("C")]
+    non_celebrity = target_choice_model(civilian, df, calendar=calendar)
+    non_celebrity["season"] = "non_celebrity"
+    summary = pd.concat([target_choice_model(votes_enriched, df, calendar=calendar), non_celebrity], ignore_index=True)
+
+    print("\nConditional logit of round-table target choice:")
+    print(summary[["attribute", "coef", "odds_ratio", "se_bootstrap", "ci_low", "ci_high"]])
+
+    summary.to_csv(OUTPUT_DIR / "target_choice_logit.csv", index=False)
+    summary.to_json(OUTPUT_DIR / "target_choice_logit.json", orient="records")
+    print(f"Files saved in: {OUTPUT_DIR.resolve()}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import glob
+import argparse
+import shutil
+import tempfile
+
+from name_resolver import NameIndex, REVIEW_COLUMNS, resolve_votes, unresolved_report
+from roster_index import RosterIndex, vote_appearances, merge_appearances, vote_calendar, merge_vote_calendars
 
 
 # This will look for all CSVs starting with 'UK_traitors'
@@ -11,6 +17,7 @@ EARLY_EPISODE_CUTOFFS = 4
 GROUP_COLS = ["Inferred_Gender", "ethnicity_group"]
 
 VOTES_FILES_PATTERN = "data/votes/*.csv"
+VOTES_CHUNKSIZE = 100_000
 
 
 def load_and_prepare_all_seasons(pattern):
@@ -52,23 +59,45 @@ def load_votes(pattern):
     dfs = []
     for file in files:
         print(f"Loading votes from {file}...")
-        df = pd.read_csv(file)
-
-        # Standardize columns
-        df.columns = df.columns.str.strip()
-        df["player"] = df["player"].astype(str).str.strip()
-        df["target"] = df["target"].astype(str).str.strip()
+        df = standardize_votes(pd.read_csv(file))
         
         # Both player and target are now IDs; no need to generate target_id
         dfs.append(df)
 
     return pd.concat(dfs, ignore_index=True)
 
-def enrich_votes_with_demographics(votes_df, contestants_df):
+def standardize_votes(df):
+    df.columns = df.columns.str.strip()
+    df["player"] = df["player"].astype(str).str.strip()
+    df["target"] = df["target"].astype(str).str.strip()
+    return df
 
-    votes = votes_df.copy()
+def iter_vote_chunks(pattern, chunksize=VOTES_CHUNKSIZE):
+    files = glob.glob(pattern)
+    if not files:
+        raise FileNotFoundError(f"No vote files found: {pattern}")
+
+    # Not every season has the same columns (e.g. second_turn); align chunks
+    # to the same union load_votes' concat would produce
+    columns = []
+    for file in files:
+        for col in pd.read_csv(file, nrows=0).columns.str.strip():
+            if col not in columns:
+                columns.append(col)
 
-    votes = votes[votes["target"].astype(str).str.contains(r'^\d|^C', regex=True, na=False)]
+    for file in files:
+        print(f"Streaming votes from {file}...")
+        for df in pd.read_csv(file, chunksize=chunksize):
+            yield standardize_votes(df).reindex(columns=columns)
+
+def enrich_votes_with_demographics(votes_df, contestants_df, name_index=None, verbose=True):
+
+    if name_index is None:
+        name_index = NameIndex(contestants_df)
+
+    # Map vote cells to player_ids; status cells and unmatched names drop out here
+    votes = resolve_votes(votes_df, name_index)
+    votes = votes[votes["target"].notna()].drop(columns=["target_raw"])
 
     # Merge target demographics
     merged = votes.merge(
@@ -92,8 +121,9 @@ def enrich_votes_with_demographics(votes_df, contestants_df):
         'ethnicity_group': 'voter_ethnicity'
     }).drop(columns=['player_id'])
 
-    print(f"Votes after enrichment: {len(merged)} rows")
-    print(f"Columns in enriched votes: {merged.columns.tolist()}")
+    if verbose:
+        print(f"Votes after enrichment: {len(merged)} rows")
+        print(f"Columns in enriched votes: {merged.columns.tolist()}")
     return merged
 
 
@@ -243,22 +273,22 @@ def contestant_lookup(df):
         .rename(columns={"Contestant": "target"})
     )
 
-def get_round_baseline(votes_df, round_number, season=None):
+def get_round_baseline(room_counts, round_number, season=None):
 
-    data = votes_df[votes_df['round_table'] == round_number]
+    # room_counts is RosterIndex.sweep(): who was still in the game at each
+    # round, whether or not they cast a vote there
+    data = room_counts[room_counts['round_table'] == round_number]
     if season is not None:
-        data = data[data['Season'] == season]
+        data = data[data['Season'] == str(season)]
 
     if data.empty:
         return pd.DataFrame()
 
-    # Unique players in this round
-    active_players = data[['player', 'voter_gender', 'voter_ethnicity']].drop_duplicates()
-
     baseline = (
-        active_players.groupby(['voter_gender', 'voter_ethnicity'])
-        .size()
-        .reset_index(name='player_count')
+        data.groupby(['Inferred_Gender', 'ethnicity_group'])['player_count']
+        .sum()
+        .reset_index()
+        .rename(columns={'Inferred_Gender': 'voter_gender', 'ethnicity_group': 'voter_ethnicity'})
     )
 
     total_active = baseline['player_count'].sum()
@@ -282,7 +312,107 @@ def get_round_votes(votes_enriched_df, round, season=None):
     return data
 
 
-def main():
+def round_baselines(roster, seasons, max_round):
+    room_counts = roster.sweep()
+    baseline_rounds = None
+    for i in range(1, max_round + 1):
+        baseline_round = pd.concat(
+            [get_round_baseline(room_counts, i)] +
+            [get_round_baseline(room_counts, i, s) for s in seasons],
+            ignore_index=True
+        )
+        if baseline_rounds is None:
+            baseline_rounds = baseline_round
+        else:
+            baseline_rounds = pd.concat([baseline_rounds, baseline_round], ignore_index=True)
+    return baseline_rounds
+
+def merge_review_reports(reports):
+    # Per-chunk unresolved_report()s folded into one. The candidate fields
+    # depend only on (Season, target_raw), so any chunk's copy will do.
+    reports = [r for r in reports if not r.empty]
+    if not reports:
+        return pd.DataFrame(columns=REVIEW_COLUMNS)
+
+    keys = ["Season", "target_raw"]
+    agg = {col: "first" for col in REVIEW_COLUMNS if col not in keys}
+    agg["vote_count"] = "sum"
+    agg["rounds"] = lambda r: sorted(set().union(*r))
+    return (
+        pd.concat(reports, ignore_index=True)
+        .groupby(keys)
+        .agg(agg)
+        .reset_index()[REVIEW_COLUMNS]
+    )
+
+def stream_vote_outputs(contestants_df, seasons, name_index, output_dir, chunksize=VOTES_CHUNKSIZE):
+    # Each chunk is enriched and split into the same (round, season) slices the
+    # in-memory path concatenates; slices are spilled to disk as formatted
+    # CSV/JSON text and stitched back in order, so only one chunk plus each
+    # player's first/last round is ever held in memory.
+    season_keys = [None] + list(seasons)
+    header = None
+    max_round = 0
+    total = 0
+    appearance_parts = []
+    count_parts = []
+    review_parts = []
+    calendar_parts = []
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        spill_dir = Path(spill_dir)
+
+        for chunk in iter_vote_chunks(VOTES_FILES_PATTERN, chunksize):
+            resolved = resolve_votes(chunk, name_index)
+            review_parts.append(unresolved_report(resolved, name_index))
+            calendar_parts.append(vote_calendar(resolved))
+            enriched = enrich_votes_with_demographics(chunk, contestants_df, name_index, verbose=False)
+            if enriched.empty:
+                continue
+
+            total += len(enriched)
+            max_round = max(max_round, int(enriched["round_table"].max()))
+            appearance_parts.append(vote_appearances(enriched))
+            count_parts.append(enriched.groupby(["voter_gender", "voter_ethnicity"]).size())
+
+            for i in sorted(enriched["round_table"].unique()):
+                for k, s in enumerate(season_keys):
+                    part = get_round_votes(enriched, i, s)
+                    if part.empty:
+                        continue
+                    if header is None:
+                        header = part.head(0).to_csv(index=False)
+                    with open(spill_dir / f"{i}_{k}.csv", "a", newline="") as f:
+                        f.write(part.to_csv(index=False, header=False))
+                    with open(spill_dir / f"{i}_{k}.json", "a") as f:
+                        f.write(part.to_json(orient="records")[1:-1] + "\n")
+
+        print(f"Total votes after enrichment: {total}")
+
+        with open(output_dir / "early_vote_composition.csv", "w", newline="") as out_csv, \
+                open(output_dir / "early_vote_composition.json", "w") as out_json:
+            out_csv.write(header or "")
+            out_json.write("[")
+            first = True
+            for i in range(1, max_round + 1):
+                for k in range(len(season_keys)):
+                    if not (spill_dir / f"{i}_{k}.csv").exists():
+                        continue
+                    with open(spill_dir / f"{i}_{k}.csv", newline="") as f:
+                        shutil.copyfileobj(f, out_csv)
+                    with open(spill_dir / f"{i}_{k}.json") as f:
+                        for line in f:
+                            out_json.write(("" if first else ",") + line.rstrip("\n"))
+                            first = False
+            out_json.write("]")
+
+    roster = RosterIndex(contestants_df, merge_appearances(appearance_parts), merge_vote_calendars(calendar_parts))
+    baseline_rounds = round_baselines(roster, seasons, max_round)
+    vote_counts = pd.concat(count_parts).groupby(level=[0, 1]).sum().reset_index(name="vote_count")
+    return baseline_rounds, vote_counts, merge_review_reports(review_parts)
+
+
+def main(stream=False, chunksize=VOTES_CHUNKSIZE):
     OUTPUT_DIR.mkdir(exist_ok=True)
 
     try:
@@ -319,32 +449,38 @@ def main():
                          [finalist_composition(df, s) for s in seasons],
                          ignore_index=True)
     
-    votes_df = load_votes(VOTES_FILES_PATTERN)
-    votes_enriched = enrich_votes_with_demographics(votes_df, df)
-    print(f"Total votes after enrichment: {len(votes_enriched)}")
-    # Vote Composition
-    early_votes = []
-    max_round = int(votes_enriched['round_table'].max())
-    for i in range(1, max_round + 1):
-        early_votes.append(get_round_votes(votes_enriched, i))
-        for s in seasons:
-            early_votes.append(get_round_votes(votes_enriched, i, s))
-
-    early_votes = pd.concat(early_votes, ignore_index=True)
-  
-    # Baseline Episodes
-    baseline_rounds = None
-    for i in range(1, max_round + 1):
-        baseline_round = pd.concat(
-            [get_round_baseline(votes_enriched, i)] +
-            [get_round_baseline(votes_enriched, i, s) for s in seasons],
-            ignore_index=True
-        )
-        if baseline_rounds is None:
-            baseline_rounds = baseline_round
-        else:
-            baseline_rounds = pd.concat([baseline_rounds, baseline_round], ignore_index=True)   
-    vote_counts = votes_enriched.groupby(["voter_gender", "voter_ethnicity"]).size().reset_index(name="vote_count")
+    name_index = NameIndex(df)
+
+    if stream:
+        # Vote Composition is written straight to OUTPUT_DIR chunk by chunk
+        baseline_rounds, vote_counts, review = stream_vote_outputs(df, seasons, name_index, OUTPUT_DIR, chunksize)
+        early_votes = None
+    else:
+        votes_df = load_votes(VOTES_FILES_PATTERN)
+        votes_enriched = enrich_votes_with_demographics(votes_df, df, name_index)
+        print(f"Total votes after enrichment: {len(votes_enriched)}")
+
+        resolved = resolve_votes(votes_df, name_index)
+        review = unresolved_report(resolved, name_index)
+
+        # Vote Composition
+        early_votes = []
+        max_round = int(votes_enriched['round_table'].max())
+        for i in range(1, max_round + 1):
+            early_votes.append(get_round_votes(votes_enriched, i))
+            for s in seasons:
+                early_votes.append(get_round_votes(votes_enriched, i, s))
+
+        early_votes = pd.concat(early_votes, ignore_index=True)
+
+        # Baseline Episodes
+        roster = RosterIndex(df, vote_appearances(votes_enriched), vote_calendar(resolved))
+        baseline_rounds = round_baselines(roster, seasons, max_round)
+        vote_counts = votes_enriched.groupby(["voter_gender", "voter_ethnicity"]).size().reset_index(name="vote_count")
+
+    if not review.empty:
+        print(f"\n{review['vote_count'].sum()} vote cells could not be matched to a contestant:")
+        print(review)
     print("\nOverall Vote Counts by Demographics:")
     print(vote_counts)
     # Save outputs
@@ -353,8 +489,10 @@ def main():
     survival.to_csv(OUTPUT_DIR / "survival_stats.csv", index=False)
     age_survival.to_csv(OUTPUT_DIR / "age_survival_stats.csv", index=False)
     finalist_comp.to_csv(OUTPUT_DIR / "finalist_composition.csv", index=False)
-    early_votes.to_csv(OUTPUT_DIR / "early_vote_composition.csv", index=False)
+    if early_votes is not None:
+        early_votes.to_csv(OUTPUT_DIR / "early_vote_composition.csv", index=False)
     baseline_rounds.to_csv(OUTPUT_DIR / "baseline_rounds.csv", index=False)
+    review.to_csv(OUTPUT_DIR / "unresolved_vote_cells.csv", index=False)
     
                                 
     # JSON Outputs (unique columns fix included)
@@ -363,11 +501,17 @@ def main():
     survival.to_json(OUTPUT_DIR / "survival_stats.json", orient="records")
     age_survival.to_json(OUTPUT_DIR / "age_survival_stats.json", orient="records")
     finalist_comp.to_json(OUTPUT_DIR / "finalist_composition.json", orient="records")
-    early_votes.to_json(OUTPUT_DIR / "early_vote_composition.json", orient="records")
+    if early_votes is not None:
+        early_votes.to_json(OUTPUT_DIR / "early_vote_composition.json", orient="records")
     baseline_rounds.to_json(OUTPUT_DIR / "baseline_rounds.json", orient="records")
     
     print(f"\nSuccess! Combined analysis for {len(seasons)} seasons completed.")
     print(f"Files saved in: {OUTPUT_DIR.resolve()}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true",
+                        help="read vote logs in chunks instead of loading them all at once")
+    parser.add_argument("--chunksize", type=int, default=VOTES_CHUNKSIZE)
+    args = parser.parse_args()
+    main(stream=args.stream, chunksize=args.chunksize)
\ No newline at end of file
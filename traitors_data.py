@@ -1,26 +1,52 @@
 import pandas as pd
-import requests
-import gender_guesser.detector as gender
-from ethnicolr import pred_wiki_name
 from io import StringIO
+from functools import lru_cache
 import re
-from bs4 import BeautifulSoup
-from scipy import io
+
+# requests, BeautifulSoup, gender_guesser and ethnicolr (which pulls in a
+# deep-learning stack) are imported inside the functions that use them, so
+# importing this module for the parsing helpers stays cheap.
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def fetch_page(url):
+    import requests
+
+    response = requests.get(url, headers=HEADERS)
+    if response.status_code != 200:
+        print(f"Failed to retrieve data from {url}")
+        return None
+    return response.text
+
+
+@lru_cache(maxsize=None)
+def gender_detector():
+    import gender_guesser.detector as gender
+    return gender.Detector()
+
 
 def get_traitors_automated_data(url, season):
     # Scrape the right table from the Wikipedia page
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200: 
-        print(f"Failed to retrieve data from {url}")
+    html = fetch_page(url)
+    if html is None:
         return None
 
-    html = response.text.replace("“", '"').replace("”", '"')
+    df = parse_contestants(html, season)
+    if df is None: return None
+    return infer_demographics(df)
+
+
+def parse_contestants(html, season):
+    html = html.replace("“", '"').replace("”", '"')
     html = re.sub(r'(rowspan|colspan)="(\d+)[^"]*"', r'\1="\2"', html)
     tables = pd.read_html(StringIO(html))
     df = next((t for t in tables if 'Age' in t.columns), None)
     if df is None: return None
-    
+    return prepare_contestants(df, season)
+
+
+def prepare_contestants(df, season):
     # Remove Wiki markers and split into First/Last for ethnicolr
     
     df['Contestant'] = df['Contestant'].replace(r'\[.*\]', '', regex=True).str.strip()
@@ -41,13 +67,19 @@ def get_traitors_automated_data(url, season):
             df = df.drop(columns=[status_col])
     else:
         print("No 'Finish' column found for Episode extraction.")
-    
-    
+
+    return df
+
+
+def infer_demographics(df):
     # Gender Inference
-    d = gender.Detector()
+    d = gender_detector()
     df['Inferred_Gender'] = df['fname'].apply(d.get_gender)
 
-    # Ethnicity Inference
+    # Ethnicity Inference. The import stays outside the try: a missing
+    # ethnicolr must fail the run, not tag every contestant "Unknown"
+    from ethnicolr import pred_wiki_name
+
     try:
         cols_before = df.columns.tolist()
 
@@ -69,51 +101,67 @@ def get_traitors_automated_data(url, season):
 
 
 def get_votes(url, season):
-   
-    headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(url, headers=headers)
-    soup = BeautifulSoup(resp.text, 'html.parser')
-    tables = soup.find_all('table', class_='wikitable')
+    html = fetch_page(url)
+    if html is None:
+        return pd.DataFrame()
+    return parse_votes(html, season)
+
+
+def parse_votes(html, season):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    tables = [
+        [[(cell.name == "th", cell.get_text("\n", strip=True), cell.get("colspan", 1)) for cell in row.find_all(['td', 'th'])]
+         for row in table.find_all("tr")]
+        for table in soup.find_all('table', class_='wikitable')
+    ]
+    return votes_from_tables(tables, season)
+
+
+def votes_from_tables(tables, season):
+    # Each table is a list of rows, each row a list of (is_header, text, colspan).
+    # Line breaks in the text are "\n", whether it came from the HTML or the dump
     all_data = []
 
-    for table in tables:
-        rows = table.find_all("tr")
-        
+    for rows in tables:
+        if not rows:
+            continue
+
         # Attempt to get episode numbers from the first row
         header_row = rows[0]
         episodes = []
-        for th in header_row.find_all("th"):
-            colspan = int(th.get("colspan", 1))
-            text = th.get_text(strip=True)
+        for is_header, text, colspan in header_row:
+            text = text.replace("\n", "")
             # Only keep numeric episode headers
-            if text.isdigit():
-                episodes.extend([text]*colspan)
+            if is_header and text.isdigit():
+                episodes.extend([text]*int(colspan))
 
         # Skip tables with no episode info
         if not episodes:
             continue
 
         # Process each player row
-        for row in rows[1:]:
-            cells = row.find_all(['td', 'th'])
+        for cells in rows[1:]:
             if len(cells) < 2:
                 continue
             
             player = None
-            for cell in cells:
-                if cell.name == "th" and cell.get_text(strip=True) not in ["Traitors'Decision", "Immune", "Banishment", "Vote"]:
-                    player = cell.get_text(strip=True)
+            for is_header, text, _ in cells:
+                # Headers are read flat: "Traitors'<br>Decision" is "Traitors'Decision"
+                text = text.replace("\n", "")
+                if is_header and text not in ["Traitors'Decision", "Immune", "Banishment", "Vote"]:
+                    player = text
                     break
             if not player:
                 continue
 
             ep_index = 0
-            for cell in cells:
-                if cell.name == "td":
-                    text = cell.get_text(strip=True).replace("\n", ", ")
+            for is_header, text, colspan in cells:
+                if not is_header:
+                    text = text.replace("\n", ", ")
                     target_id = f"{season}_{text}"
-                    colspan = int(cell.get("colspan", 1))
-                    for _ in range(colspan):
+                    for _ in range(int(colspan)):
                         if ep_index < len(episodes):
                             id = f"{season}_{player}"
                             all_data.append({
@@ -131,6 +179,10 @@ def get_votes(url, season):
 def get_data_per_season(url, season_number, celebrity):
     df = get_traitors_automated_data(url, season_number)
     ds = get_votes(url, season_number)
+    return label_season(df, ds, season_number, celebrity)
+
+
+def label_season(df, ds, season_number, celebrity):
     if df is not None and not celebrity:
         df['Season'] = season_number
         ds['Season'] = season_number
@@ -140,15 +192,19 @@ def get_data_per_season(url, season_number, celebrity):
     return df, ds
 
 
+def save_season_data(season_df, season_ds, country, season, output_dir="."):
+    name = f"{country}_traitors_season_{season}_ai_tagged.csv"
+    season_df.to_csv(f"{output_dir}/{name}", index=False)
+    name2 = f"{country}_traitors_season_{season}_votes.csv"
+    season_ds.to_csv(f"{output_dir}/{name2}", index=False)
+
+
 def get_all_seasons_data(base_url, country, num_seasons, celebrity=False):
     for season in range(1, num_seasons+1):  
         season_url = f"{base_url}{season}" if not celebrity else base_url
         season_df, season_ds = get_data_per_season(season_url, season, celebrity)
         if season_df is not None:
-            name = f"{country}_traitors_season_{season}_ai_tagged.csv"
-            season_df.to_csv(name, index=False)
-            name2 = f"{country}_traitors_season_{season}_votes.csv"
-            season_ds.to_csv(name2, index=False)
+            save_season_data(season_df, season_ds, country, season)
             
     
 if __name__ == "__main__":
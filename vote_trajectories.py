@@ -0,0 +1,181 @@
+import pandas as pd
+import numpy as np
+
+from traitors_banishment_analysis import (
+    DATA_FILES_PATTERN,
+    VOTES_FILES_PATTERN,
+    OUTPUT_DIR,
+    load_and_prepare_all_seasons,
+    load_votes,
+    enrich_votes_with_demographics,
+)
+from round_outcomes import revote_tied_players
+
+
+TRAJECTORY_ATTRIBUTES = ["target_gender", "target_ethnicity"]
+VOTER_GROUP_COLS = ["voter_gender", "voter_ethnicity"]
+
+
+def build_target_sequences(votes_enriched_df, attribute="target"):
+    # One row per player, one column per round table; -1 marks "no vote"
+    data = votes_enriched_df.dropna(subset=[attribute])
+    data = data[data[attribute].astype(str) != "nan"]
+
+    player_codes, players = pd.factorize(data["player"], sort=True)
+    state_codes, states = pd.factorize(data[attribute], sort=True)
+    rounds = np.sort(data["round_table"].astype(int).unique())
+    round_codes = np.searchsorted(rounds, data["round_table"].astype(int).to_numpy())
+
+    seq = np.full((len(players), len(rounds)), -1, dtype=np.int64)
+    seq[player_codes, round_codes] = state_codes
+
+    return pd.Index(players), rounds, pd.Index(states), seq
+
+
+def _consecutive_pairs(seq, rounds, revote_pairs=None):
+    # Only r -> r+1 counts as a transition; gaps in the round numbering are
+    # skipped, and so is a tie -> revote pair, which is the same decision twice
+    prev_state = seq[:, :-1]
+    next_state = seq[:, 1:]
+    adjacent = np.diff(rounds) == 1
+    valid = (prev_state >= 0) & (next_state >= 0) & adjacent[np.newaxis, :]
+    if revote_pairs is not None:
+        valid &= ~revote_pairs
+    return prev_state, next_state, valid
+
+
+def _revote_pairs(votes_enriched_df, players, rounds):
+    # True where the round after pair j is a revote in the player's season
+    season = _player_attribute(votes_enriched_df, players, "Season")
+    out = np.zeros((len(players), max(len(rounds) - 1, 0)), dtype=bool)
+    for revote_season, revote_round in revote_tied_players(votes_enriched_df):
+        j = np.searchsorted(rounds, revote_round) - 1
+        if j >= 0 and rounds[j + 1] == revote_round:
+            out[season == str(revote_season), j] = True
+    return out
+
+
+def _player_attribute(votes_enriched_df, players, col):
+    values = (
+        votes_enriched_df[["player", col]]
+        .drop_duplicates(subset="player")
+        .set_index("player")[col]
+    )
+    return values.reindex(players).astype(str).to_numpy()
+
+
+def _season_group_keys(votes_enriched_df, players, group_col):
+    # Every player contributes to its own season and to "all"
+    season = _player_attribute(votes_enriched_df, players, "Season")
+    group = _player_attribute(votes_enriched_df, players, group_col)
+    keys = pd.MultiIndex.from_arrays(
+        [np.concatenate([season, np.full(len(players), "all")]),
+         np.concatenate([group, group])]
+    )
+    key_codes, key_values = pd.factorize(keys, sort=True)
+    return key_codes.reshape(2, len(players)), key_values
+
+
+def transition_matrices(votes_enriched_df, attribute):
+    players, rounds, states, seq = build_target_sequences(votes_enriched_df, attribute)
+    if len(players) == 0 or len(rounds) < 2:
+        return pd.DataFrame()
+
+    prev_state, next_state, valid = _consecutive_pairs(seq, rounds, _revote_pairs(votes_enriched_df, players, rounds))
+    k = len(states)
+    cell = prev_state * k + next_state
+
+    rows = []
+    for group_col in VOTER_GROUP_COLS:
+        key_codes, key_values = _season_group_keys(votes_enriched_df, players, group_col)
+        g = len(key_values)
+
+        # Flatten (group, from, to) into one bincount over all players and rounds
+        flat = key_codes[:, :, np.newaxis] * (k * k) + cell[np.newaxis, :, :]
+        mask = np.broadcast_to(valid, flat.shape)
+        counts = np.bincount(flat[mask], minlength=g * k * k).reshape(g, k, k)
+
+        row_totals = counts.sum(axis=2, keepdims=True)
+        probs = np.divide(counts, row_totals, out=np.zeros(counts.shape), where=row_totals > 0)
+
+        gi, fi, ti = np.meshgrid(np.arange(g), np.arange(k), np.arange(k), indexing="ij")
+        df = pd.DataFrame({
+            "season": key_values.get_level_values(0)[gi.ravel()],
+            "group_type": group_col,
+            "group_value": key_values.get_level_values(1)[gi.ravel()],
+            "attribute": attribute,
+            "from_state": states[fi.ravel()],
+            "to_state": states[ti.ravel()],
+            "transitions": counts.ravel(),
+            "transition_probability": probs.ravel(),
+        })
+        rows.append(df[np.repeat(row_totals.ravel() > 0, k)])
+
+    return pd.concat(rows, ignore_index=True)
+
+
+def vote_persistence(votes_enriched_df):
+    players, rounds, _, seq = build_target_sequences(votes_enriched_df, "target")
+    if len(players) == 0 or len(rounds) < 2:
+        return pd.DataFrame()
+
+    prev_target, next_target, valid = _consecutive_pairs(seq, rounds, _revote_pairs(votes_enriched_df, players, rounds))
+    repeats = ((prev_target == next_target) & valid).sum(axis=1)
+    pairs = valid.sum(axis=1)
+
+    rows = []
+    for group_col in VOTER_GROUP_COLS:
+        key_codes, key_values = _season_group_keys(votes_enriched_df, players, group_col)
+        g = len(key_values)
+        flat_codes = key_codes.ravel()
+
+        repeat_votes = np.bincount(flat_codes, weights=np.tile(repeats, 2), minlength=g)
+        consecutive_pairs = np.bincount(flat_codes, weights=np.tile(pairs, 2), minlength=g)
+
+        df = pd.DataFrame({
+            "season": key_values.get_level_values(0),
+            "group_type": group_col,
+            "group_value": key_values.get_level_values(1),
+            "repeat_votes": repeat_votes.astype(int),
+            "consecutive_pairs": consecutive_pairs.astype(int),
+        })
+        df["persistence_rate"] = np.divide(
+            repeat_votes, consecutive_pairs,
+            out=np.full(g, np.nan), where=consecutive_pairs > 0
+        )
+        rows.append(df)
+
+    return pd.concat(rows, ignore_index=True)
+
+
+def main():
+    OUTPUT_DIR.mkdir(exist_ok=True)
+
+    try:
+        df = load_and_prepare_all_seasons(DATA_FILES_PATTERN)
+        votes_df = load_votes(VOTES_FILES_PATTERN)
+    except FileNotFoundError as e:
+        print(e)
+        return
+
+    votes_enriched = enrich_votes_with_demographics(votes_df, df)
+
+    transitions = pd.concat(
+        [transition_matrices(votes_enriched, attr) for attr in TRAJECTORY_ATTRIBUTES],
+        ignore_index=True
+    )
+    persistence = vote_persistence(votes_enriched)
+
+    print("\nVote Persistence by Voter Group (all seasons):")
+    print(persistence[persistence["season"] == "all"])
+
+    transitions.to_csv(OUTPUT_DIR / "vote_transitions.csv", index=False)
+    persistence.to_csv(OUTPUT_DIR / "vote_persistence.csv", index=False)
+
+    transitions.to_json(OUTPUT_DIR / "vote_transitions.json", orient="records")
+    persistence.to_json(OUTPUT_DIR / "vote_persistence.json", orient="records")
+
+    print(f"Files saved in: {OUTPUT_DIR.resolve()}")
+
+if __name__ == "__main__":
+    main()
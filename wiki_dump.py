@@ -0,0 +1,327 @@
+import argparse
+import bz2
+import html
+import re
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pandas as pd
+
+from traitors_data import (
+    prepare_contestants,
+    infer_demographics,
+    votes_from_tables,
+    label_season,
+    save_season_data,
+)
+
+
+# "The Traitors (British TV series) series 2", "The Traitors (American TV
+# series) season 1", "The Celebrity Traitors", ...
+FRANCHISE_TITLE = re.compile(
+    r"^The (?P<celebrity>Celebrity )?Traitors"
+    r"(?: \((?P<version>[^)]+?) TV series\))?"
+    r"(?: (?:series|season) (?P<season>\d+))?$"
+)
+COUNTRY_CODES = {
+    "British": "UK",
+    "American": "US",
+    "Australian": "AU",
+    "Canadian": "CA",
+    "Irish": "IE",
+    "New Zealand": "NZ",
+}
+DEFAULT_VERSION = "British"
+PROGRESS_EVERY = 100_000
+
+# Templates whose output is not cell text (footnotes, citations, icons)
+DROPPED_TEMPLATES = {"efn", "refn", "sfn", "ref", "r", "cn", "citation needed", "flagicon", "dagger", "double-dagger"}
+# Templates that display their first argument rather than their last
+FIRST_ARG_TEMPLATES = {"abbr", "tooltip"}
+
+COMMENT = re.compile(r"<!--.*?-->", re.S)
+REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+BR = re.compile(r"<br\s*/?>", re.I)
+TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+TEMPLATE = re.compile(r"\{\{([^{}]*)\}\}")
+LINK = re.compile(r"\[\[([^\[\]]*)\]\]")
+EXTERNAL_LINK = re.compile(r"\[(?:https?:)?//[^\s\]]+\s*([^\]]*)\]")
+SPAN_ATTR = re.compile(r'(colspan|rowspan)\s*=\s*["\']?(\d+)', re.I)
+CELL_TOKEN = re.compile(r"\[\[|\]\]|\{\{|\}\}|\|\||!!|\|")
+# Leading attributes whose "|" separator comes from a template, as in
+# | colspan="2" {{N/A|Banished}}
+ATTR_PREFIX = re.compile(
+    r"""^\s*((?:(?:colspan|rowspan|style|class|align|bgcolor|scope|width|data-sort-value)\s*=\s*"""
+    r"""(?:"[^"]*"|'[^']*'|[^\s|{]+)\s*)+)""", re.I
+)
+
+
+def open_dump(path):
+    # Dumps are usually .xml.bz2; Special:Export files are plain XML
+    path = Path(path)
+    return bz2.open(path, "rb") if path.suffix == ".bz2" else open(path, "rb")
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_pages(path, title_pattern=FRANCHISE_TITLE, stats=None):
+    # Stream (title, wikitext) of matching article pages. Each <page> is
+    # cleared from the tree as soon as it ends, so memory stays flat however
+    # large the dump is.
+    stats = stats if stats is not None else {}
+    stats.update(pages=0, matched=0)
+    with open_dump(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or _local(elem.tag) != "page":
+                continue
+            stats["pages"] += 1
+            if stats["pages"] % PROGRESS_EVERY == 0:
+                print(f"  {stats['pages']} pages scanned, {stats['matched']} matched")
+
+            title, ns, text = None, None, None
+            for child in elem.iter():
+                name = _local(child.tag)
+                if name == "title":
+                    title = child.text
+                elif name == "ns":
+                    ns = child.text
+                elif name == "text":
+                    # Full-history exports have several revisions, the last is newest
+                    text = child.text or ""
+            root.clear()
+
+            if ns not in (None, "0") or not title or not title_pattern.match(title):
+                continue
+            if text is None or text.lstrip().upper().startswith("#REDIRECT"):
+                continue
+            stats["matched"] += 1
+            yield title, text
+
+
+def page_season(title, title_pattern=FRANCHISE_TITLE):
+    # (country, season number, celebrity) for a franchise page title
+    m = title_pattern.match(title)
+    if m is None:
+        return None
+    celebrity = m.group("celebrity") is not None
+    version = m.group("version") or DEFAULT_VERSION
+    season = m.group("season")
+    if season is None:
+        # Franchise overview pages have no season; single-season shows do
+        if not celebrity:
+            return None
+        season = 1
+    country = COUNTRY_CODES.get(version, version.replace(" ", "_"))
+    if celebrity:
+        country = f"{country}_Celebrity"
+    return country, int(season), celebrity
+
+
+def _split_top_level(s, separators):
+    # Split on separators that are not inside [[links]] or {{templates}}
+    parts, depth, start = [], 0, 0
+    for m in CELL_TOKEN.finditer(s):
+        token = m.group()
+        if token in ("[[", "{{"):
+            depth += 1
+        elif token in ("]]", "}}"):
+            depth = max(depth - 1, 0)
+        elif depth == 0 and token in separators:
+            parts.append(s[start:m.start()])
+            start = m.end()
+    parts.append(s[start:])
+    return parts
+
+
+def _render_template(body):
+    parts = _split_top_level(body, {"|"})
+    name = parts[0].strip().lower()
+    args = [p for p in parts[1:] if not re.match(r"^\s*[\w ]+\s*=", p)]
+    if name in DROPPED_TEMPLATES or name.startswith("cite") or not args:
+        return ""
+    return args[0] if name in FIRST_ARG_TEMPLATES else args[-1]
+
+
+def _render_link(body):
+    target, _, label = body.partition("|")
+    if re.match(r"^\s*(File|Image|Category):", target, re.I):
+        return ""
+    return label.rsplit("|", 1)[-1] if label else target
+
+
+def wikitext_to_text(s):
+    # Roughly what get_text() returns for the rendered cell; line breaks are
+    # kept as "\n" so multi-name cells stay separable
+    s = COMMENT.sub("", s)
+    s = REF.sub("", s)
+    s = BR.sub("\n", s)
+    while True:
+        rendered = TEMPLATE.sub(lambda m: _render_template(m.group(1)), s)
+        rendered = LINK.sub(lambda m: _render_link(m.group(1)), rendered)
+        if rendered == s:
+            break
+        s = rendered
+    s = EXTERNAL_LINK.sub(r"\1", s)
+    s = TAG.sub("", s)
+    s = html.unescape(s.replace("'''", "").replace("''", ""))
+    lines = (" ".join(line.split()) for line in s.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _cell(raw, is_header):
+    # "attrs | content" or just "content"
+    parts = _split_top_level(raw, {"|"})
+    if len(parts) > 1:
+        attrs, content = parts[0], "|".join(parts[1:])
+    else:
+        m = ATTR_PREFIX.match(raw)
+        attrs, content = (m.group(1), raw[m.end():]) if m else ("", raw)
+    spans = {k.lower(): int(v) for k, v in SPAN_ATTR.findall(attrs)}
+    return is_header, wikitext_to_text(content), spans.get("colspan", 1), spans.get("rowspan", 1)
+
+
+def iter_wikitables(text):
+    # (table attributes, rows) for each top-level {| ... |} block. Rows are
+    # lists of (is_header, text, colspan, rowspan); nested tables are skipped.
+    depth, attrs, rows = 0, "", []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("{|"):
+            depth += 1
+            if depth == 1:
+                attrs, rows, raw_row = line[2:], [], None
+            continue
+        if line.startswith("|}"):
+            depth -= 1
+            if depth == 0:
+                if raw_row:
+                    rows.append(raw_row)
+                yield attrs, [[_cell(raw, h) for h, raw in row] for row in rows if row]
+            continue
+        if depth != 1 or line.startswith("|+"):
+            continue
+
+        if line.startswith("|-"):
+            if raw_row:
+                rows.append(raw_row)
+            raw_row = []
+        elif line[:1] in ("|", "!"):
+            is_header = line[0] == "!"
+            raw_row = raw_row if raw_row is not None else []
+            separators = {"||", "!!"} if is_header else {"||"}
+            raw_row.extend((is_header, cell) for cell in _split_top_level(line[1:], separators))
+        elif raw_row:
+            # Cell content continues on the next line
+            h, raw = raw_row[-1]
+            raw_row[-1] = (h, f"{raw}\n{line}")
+
+
+def _expand_spans(rows):
+    # Rowspan/colspan laid out on a grid, as read_html does
+    grid, carried = [], {}
+    for row in rows:
+        out, cells, col = [], list(row), 0
+        while cells or any(c >= col for c in carried):
+            if col in carried:
+                left, text = carried[col]
+                out.append(text)
+                if left == 1:
+                    del carried[col]
+                else:
+                    carried[col] = (left - 1, text)
+            elif cells:
+                _, text, colspan, rowspan = cells.pop(0)
+                for offset in range(colspan):
+                    if rowspan > 1:
+                        carried[col + offset] = (rowspan - 1, text)
+                out.append(text)
+                out.extend([text] * (colspan - 1))
+                col += colspan - 1
+            else:
+                out.append("")
+            col += 1
+        grid.append(out)
+    return grid
+
+
+def contestants_table(tables):
+    # First table with an all-header first row containing "Age", as a frame
+    for _, rows in tables:
+        if len(rows) < 2 or not all(cell[0] for cell in rows[0]):
+            continue
+        # read_html flattens line breaks: "Banished (Episode 3)"
+        grid = [[text.replace("\n", " ") for text in row] for row in _expand_spans(rows)]
+        header = grid[0]
+        if "Age" not in header:
+            continue
+        body = [(r + [""] * len(header))[:len(header)] for r in grid[1:]]
+        df = pd.DataFrame(body, columns=header).replace("", pd.NA)
+        for col in df.columns:
+            numeric = pd.to_numeric(df[col], errors="coerce")
+            if numeric.notna().sum() == df[col].notna().sum():
+                df[col] = numeric
+        return df.dropna(subset=["Contestant"]).reset_index(drop=True)
+    return None
+
+
+def parse_page(title, text):
+    season_key = page_season(title)
+    if season_key is None:
+        return None
+    country, season, celebrity = season_key
+
+    tables = [(attrs, rows) for attrs, rows in iter_wikitables(text) if "wikitable" in attrs]
+    table = contestants_table(tables)
+    if table is None:
+        return None
+
+    df = infer_demographics(prepare_contestants(table, season))
+    # The vote walk ignores rowspan, like the HTML path
+    ds = votes_from_tables([[[cell[:3] for cell in row] for row in rows] for _, rows in tables], season)
+    df, ds = label_season(df, ds, season, celebrity)
+    return country, season, df, ds
+
+
+def ingest_dump(path, output_dir, scan_only=False):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stats, written = {}, []
+    start = time.perf_counter()
+    for title, text in iter_pages(path, stats=stats):
+        if scan_only:
+            continue
+        parsed = parse_page(title, text)
+        if parsed is None:
+            print(f"Skipping {title}: no contestant table")
+            continue
+        country, season, df, ds = parsed
+        save_season_data(df, ds, country, season, output_dir)
+        written.append({"title": title, "country": country, "season": season,
+                        "contestants": len(df), "votes": len(ds)})
+        print(f"{title}: {len(df)} contestants, {len(ds)} votes")
+    elapsed = time.perf_counter() - start
+
+    size_mb = Path(path).stat().st_size / 1e6
+    print(f"\nScanned {stats['pages']} pages ({size_mb:.1f} MB) in {elapsed:.2f}s: "
+          f"{stats['pages'] / elapsed:,.0f} pages/s, {size_mb / elapsed:.1f} MB/s; "
+          f"{stats['matched']} franchise pages, {len(written)} seasons written")
+    return pd.DataFrame(written, columns=["title", "country", "season", "contestants", "votes"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill season CSVs from a local MediaWiki XML dump.")
+    parser.add_argument("dump", type=Path, help="pages-articles .xml.bz2 dump or Special:Export .xml file")
+    parser.add_argument("--output-dir", type=Path, default=Path("."))
+    parser.add_argument("--scan-only", action="store_true", help="only stream and match pages, to benchmark throughput")
+    args = parser.parse_args()
+
+    ingest_dump(args.dump, args.output_dir, args.scan_only)
+
+if __name__ == "__main__":
+    main()